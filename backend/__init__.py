@@ -0,0 +1,10 @@
+import os
+
+# Cap the native thread pools of OpenMP/BLAS (numpy's linear algebra)
+# before any of them is imported. Concurrency comes from FastAPI's request
+# threadpool; per-library pools on top of it oversubscribe the CPU under
+# load. Explicit environment settings still take precedence. The embedding
+# model sets torch's own thread count when it loads (EMBEDDING_NUM_THREADS),
+# so CPU inference is not limited by this cap.
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
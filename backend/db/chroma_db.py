@@ -3,40 +3,148 @@ ChromaDB Module
 Handles vector database operations using ChromaDB
 """
 import chromadb
+import hashlib
+import numpy as np
 from chromadb.config import Settings
-from typing import List, Dict, Any, Optional
+from collections import OrderedDict
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
+import threading
+
+try:  # SimSIMD is optional; cosine_distances falls back to numpy without it.
+    import simsimd  # type: ignore
+except Exception:  # pragma: no cover - import error handled at runtime
+    simsimd = None  # type: ignore
+
+
+def _normalize_rows(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    L2-normalize each row of a (B, D) embedding block
+    
+    Rows containing NaN/inf or with zero norm cannot be compared by cosine
+    similarity; they are left untouched and flagged as invalid.
+    
+    Args:
+        embeddings: (B, D) array of embeddings
+        
+    Returns:
+        Tuple of (normalized float32 array, boolean validity mask per row)
+    """
+    embeddings = np.array(embeddings, dtype=np.float32, order="C")
+    norms = np.linalg.norm(embeddings, axis=1)
+    valid = np.isfinite(embeddings).all(axis=1) & np.isfinite(norms) & (norms > 0)
+    embeddings[valid] /= norms[valid, None]
+    return embeddings, valid
+
+
+# HNSW index parameters, overridable through the environment. Smaller M
+# means fewer links per vector (less memory, faster inserts); larger
+# search_ef trades query latency for recall.
+_HNSW_M = int(os.getenv("CHROMA_HNSW_M", "16"))
+_HNSW_CONSTRUCTION_EF = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", "100"))
+_HNSW_SEARCH_EF = int(os.getenv("CHROMA_HNSW_SEARCH_EF", "64"))
+
+# Maximum number of query results kept in the LRU cache
+_QUERY_CACHE_SIZE = 1024
+
+
+def cosine_distances(query: np.ndarray, candidates: np.ndarray) -> np.ndarray:
+    """
+    Cosine distance from one query vector to each candidate vector
+    
+    Uses SimSIMD's AVX-512/NEON kernels when the package is installed,
+    otherwise a single numpy matrix-vector product.
+    
+    Args:
+        query: (D,) query embedding
+        candidates: (K, D) candidate embeddings
+        
+    Returns:
+        (K,) float array of cosine distances (1 - cosine similarity)
+    """
+    query = np.ascontiguousarray(query, dtype=np.float32).reshape(-1)
+    candidates = np.ascontiguousarray(candidates, dtype=np.float32)
+    if candidates.shape[0] == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    if simsimd is not None:
+        return np.asarray(simsimd.cdist(query[None, :], candidates, metric="cosine"))[0]
+
+    norms = np.linalg.norm(candidates, axis=1) * np.linalg.norm(query)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarity = np.where(norms > 0, candidates @ query / norms, 0.0)
+    return 1.0 - similarity
 
 
 class ChromaDBManager:
     """Manager for ChromaDB operations"""
     
-    def __init__(self, persist_directory: str = "./data/chroma_store"):
+    def __init__(
+        self,
+        persist_directory: str = "./data/chroma_store",
+        hnsw_m: int = _HNSW_M,
+        hnsw_construction_ef: int = _HNSW_CONSTRUCTION_EF,
+        hnsw_search_ef: int = _HNSW_SEARCH_EF
+    ):
         """
         Initialize ChromaDB client with persistence
         
         Args:
             persist_directory: Directory to persist the database
+            hnsw_m: Maximum number of HNSW links per vector
+            hnsw_construction_ef: Candidate list size while building the index
+            hnsw_search_ef: Candidate list size while querying the index
         """
         self.persist_directory = persist_directory
         
         # Ensure directory exists
         os.makedirs(persist_directory, exist_ok=True)
         
-        # Initialize persistent client
-        self.client = chromadb.PersistentClient(path=persist_directory)
+        # Initialize persistent client (telemetry off: no per-call event overhead)
+        self.client = chromadb.PersistentClient(
+            path=persist_directory,
+            settings=Settings(anonymized_telemetry=False)
+        )
         
-        # Get or create collection
+        # Get or create collection. Embeddings are stored L2-normalized, so
+        # cosine distance reduces to a single dot product per candidate.
+        # Note: the distance space, M and construction_ef of an existing
+        # collection are fixed at creation time; collections created before
+        # these settings keep the values they were created with.
         self.collection = self.client.get_or_create_collection(
             name="documents",
-            metadata={"description": "Document embeddings collection"}
+            metadata={
+                "hnsw:space": "cosine",
+                "hnsw:M": hnsw_m,
+                "hnsw:construction_ef": hnsw_construction_ef,
+                "hnsw:search_ef": hnsw_search_ef,
+                "description": "Document embeddings collection"
+            }
         )
+
+        effective = self.collection.metadata or {}
+        print(
+            "ChromaDB collection HNSW params: "
+            f"space={effective.get('hnsw:space', 'l2')}, "
+            f"M={effective.get('hnsw:M', 'default')}, "
+            f"construction_ef={effective.get('hnsw:construction_ef', 'default')}, "
+            f"search_ef={effective.get('hnsw:search_ef', 'default')}"
+        )
+
+        # Returned by count_documents when ChromaDB fails to count
+        self._last_count = 0
+
+        # LRU cache of formatted query results. Keys include a version that
+        # is bumped on every write, which invalidates all earlier entries.
+        self._query_cache: "OrderedDict[Tuple[int, int, bytes], Dict[str, Any]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._version = 0
     
     def add_document_to_chroma(
         self,
         doc_id: str,
         text: str,
-        embedding: List[float],
+        embedding: np.ndarray,
         metadata: Optional[Dict[str, Any]] = None
     ) -> bool:
         """
@@ -45,87 +153,237 @@ class ChromaDBManager:
         Args:
             doc_id: Unique document identifier
             text: Document text content
-            embedding: Pre-computed embedding vector
+            embedding: Pre-computed float32 embedding vector
             metadata: Optional metadata dictionary
             
         Returns:
             True if successful
         """
-        try:
-            # Prepare metadata (may be empty or None)
-            meta = metadata or {}
-
-            # Build arguments, only including metadatas if non-empty
-            kwargs = {
-                "ids": [doc_id],
-                "embeddings": [embedding],
-                "documents": [text],
-            }
+        return self.add_documents_to_chroma([(doc_id, text, embedding, metadata)])[0]
+
+    def add_documents_to_chroma(
+        self,
+        docs: List[Tuple[str, str, np.ndarray, Optional[Dict[str, Any]]]],
+        batch_size: int = 256
+    ) -> List[bool]:
+        """
+        Add several documents to ChromaDB, one ``collection.add`` per chunk
+        
+        Each call to Chroma pays a fixed Python/SQLite overhead plus an HNSW
+        index update, so inserting documents in chunks is much cheaper than
+        one call per document.
+        
+        Embeddings are L2-normalized before storage; every vector in the
+        collection has unit norm. Documents whose embedding is non-finite
+        or all zeros are rejected and reported as failed.
+        
+        Args:
+            docs: List of (doc_id, text, embedding, metadata) tuples
+            batch_size: Maximum number of documents per Chroma call
+            
+        Returns:
+            List of success flags, aligned with ``docs``
+        """
+        stored: List[bool] = []
 
-            if meta:
-                kwargs["metadatas"] = [meta]
+        for start in range(0, len(docs), batch_size):
+            chunk = docs[start:start + batch_size]
+            try:
+                # One contiguous (B, D) float32 block instead of B lists
+                embeddings, valid = _normalize_rows(
+                    np.stack([np.asarray(embedding, dtype=np.float32) for _, _, embedding, _ in chunk])
+                )
 
-            # Add to collection
-            self.collection.add(**kwargs)
+                rejected = [doc_id for (doc_id, _, _, _), ok in zip(chunk, valid) if not ok]
+                if rejected:
+                    print(f"Rejecting non-finite or zero embeddings for: {rejected}")
 
-            return True
-        except Exception as e:
-            print(f"Error adding document to ChromaDB: {e}")
-            return False
+                # Chroma rejects a call that repeats an ID. Keep the first
+                # copy; later copies are reported like re-adding an existing
+                # ID, which Chroma skips.
+                seen = set()
+                first = valid.copy()
+                for i, (doc_id, _, _, _) in enumerate(chunk):
+                    if doc_id in seen:
+                        first[i] = False
+                    elif valid[i]:
+                        seen.add(doc_id)
+
+                kept = [doc for doc, ok in zip(chunk, first) if ok]
+                if kept:
+                    kwargs = {
+                        "ids": [doc_id for doc_id, _, _, _ in kept],
+                        "embeddings": embeddings[first],
+                        "documents": [text for _, text, _, _ in kept],
+                    }
+
+                    # Chroma rejects empty metadata dicts but accepts None entries,
+                    # so only include metadatas if at least one is non-empty
+                    metadatas = [meta or None for _, _, _, meta in kept]
+                    if any(metadatas):
+                        kwargs["metadatas"] = metadatas
+
+                    # Add to collection
+                    self.collection.add(**kwargs)
+
+                    self._bump_version()
+
+                stored.extend(valid.tolist())
+            except Exception as e:
+                print(f"Error adding documents to ChromaDB: {e}")
+                if len(chunk) > 1:
+                    # Retry one document at a time so only the offending
+                    # documents fail, not the whole chunk
+                    stored.extend(self.add_documents_to_chroma([doc])[0] for doc in chunk)
+                else:
+                    stored.append(False)
+
+        return stored
     
     def semantic_search(
         self,
-        query_embedding: List[float],
+        query_embedding: np.ndarray,
         top_k: int = 5
     ) -> Dict[str, Any]:
         """
         Perform semantic search using query embedding
         
         Args:
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding vector (float32)
             top_k: Number of results to return
             
         Returns:
             Dictionary containing search results
         """
+        return self.semantic_search_batch(
+            np.asarray(query_embedding, dtype=np.float32).reshape(1, -1),
+            top_k=top_k
+        )[0]
+
+    def semantic_search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform semantic search for several query embeddings in one call
+        
+        Args:
+            query_embeddings: (B, D) float32 array of query embeddings
+            top_k: Number of results to return per query
+            
+        Returns:
+            List of search result dictionaries, one per query
+            
+        Raises:
+            ValueError: If any query embedding is non-finite or all zeros
+        """
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        if query_embeddings.ndim == 1:
+            query_embeddings = query_embeddings.reshape(1, -1)
+
+        # Match the unit-norm invariant of the stored embeddings
+        query_embeddings, valid = _normalize_rows(query_embeddings)
+        if not valid.all():
+            raise ValueError("Query embedding must be finite and non-zero")
+
+        # Serve repeated queries from the LRU cache; only misses hit Chroma
+        keys = [self._query_cache_key(row, top_k) for row in query_embeddings]
+        formatted_results: List[Optional[Dict[str, Any]]] = [None] * len(keys)
+        with self._query_cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._query_cache.get(key)
+                if cached is not None:
+                    self._query_cache.move_to_end(key)
+                    formatted_results[i] = cached
+
+        misses = [i for i, result in enumerate(formatted_results) if result is None]
+        if not misses:
+            return formatted_results
+
         try:
             results = self.collection.query(
-                query_embeddings=[query_embedding],
+                query_embeddings=query_embeddings[misses],
                 n_results=top_k
             )
             
             # Format results
-            formatted_results = {
-                "doc_ids": results["ids"][0] if results["ids"] else [],
-                "documents": results["documents"][0] if results["documents"] else [],
-                "metadatas": results["metadatas"][0] if results["metadatas"] else [],
-                "distances": results["distances"][0] if results["distances"] else []
-            }
+            with self._query_cache_lock:
+                for j, i in enumerate(misses):
+                    formatted_results[i] = {
+                        "doc_ids": results["ids"][j] if results["ids"] else [],
+                        "documents": results["documents"][j] if results["documents"] else [],
+                        "metadatas": results["metadatas"][j] if results["metadatas"] else [],
+                        "distances": results["distances"][j] if results["distances"] else []
+                    }
+                    self._query_cache[keys[i]] = formatted_results[i]
+                    if len(self._query_cache) > _QUERY_CACHE_SIZE:
+                        self._query_cache.popitem(last=False)
             
             return formatted_results
         except Exception as e:
             print(f"Error performing semantic search: {e}")
-            return {
-                "doc_ids": [],
-                "documents": [],
-                "metadatas": [],
-                "distances": []
-            }
+            return [
+                {
+                    "doc_ids": [],
+                    "documents": [],
+                    "metadatas": [],
+                    "distances": []
+                }
+                for _ in range(query_embeddings.shape[0])
+            ]
+
+    def _query_cache_key(self, query_embedding: np.ndarray, top_k: int) -> Tuple[int, int, bytes]:
+        """
+        Build the query cache key for a unit-norm query embedding
+        
+        The embedding is quantized to int8 before hashing so that
+        numerically near-identical queries share an entry. The collection
+        version is part of the key, so any write invalidates all entries.
+        """
+        quantized = np.round(query_embedding * 127).astype(np.int8)
+        digest = hashlib.blake2b(quantized.tobytes(), digest_size=16).digest()
+        return (self._version, top_k, digest)
+
+    def _bump_version(self) -> None:
+        """Invalidate cached query results after the collection changes"""
+        with self._query_cache_lock:
+            self._version += 1
     
-    def get_document(self, doc_id: str) -> Optional[Dict[str, Any]]:
+    def warmup(self) -> None:
+        """
+        Issue one query against the index so it is loaded into memory
+        
+        Uses a stored embedding as the probe and bypasses the query cache.
+        Does nothing for an empty collection.
+        """
+        sample = self.collection.get(limit=1, include=["embeddings"])
+        embeddings = sample.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return
+
+        self.collection.query(
+            query_embeddings=np.asarray(embeddings[:1], dtype=np.float32),
+            n_results=1
+        )
+    
+    def get_document(self, doc_id: str, include_embedding: bool = False) -> Optional[Dict[str, Any]]:
         """
         Retrieve a specific document by ID
         
         Args:
             doc_id: Document identifier
+            include_embedding: Also fetch the stored embedding; otherwise
+                the returned "embedding" is None
             
         Returns:
             Document data or None if not found
         """
         try:
+            include = ["documents", "metadatas"] + (["embeddings"] if include_embedding else [])
             results = self.collection.get(
                 ids=[doc_id],
-                include=["documents", "metadatas", "embeddings"]
+                include=include
             )
             
             # Chroma may return lists or numpy arrays here; avoid direct
@@ -148,6 +406,72 @@ class ChromaDBManager:
             print(f"Error retrieving document: {e}")
             return None
     
+    def get_documents_bulk(self, doc_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieve several documents in a single call
+
+        Args:
+            doc_ids: Document identifiers
+
+        Returns:
+            Mapping of doc_id -> {"doc_id", "document", "metadata"} for the
+            IDs that exist. Unknown IDs are left out.
+        """
+        # Chroma rejects empty and duplicate ID lists
+        doc_ids = list(dict.fromkeys(doc_ids))
+        if not doc_ids:
+            return {}
+
+        try:
+            results = self.collection.get(ids=doc_ids, include=["documents", "metadatas"])
+            ids = results.get("ids") or []
+            documents = results.get("documents")
+            metadatas = results.get("metadatas")
+
+            return {
+                found_id: {
+                    "doc_id": found_id,
+                    "document": documents[i] if documents is not None else None,
+                    "metadata": metadatas[i] if metadatas is not None else None,
+                }
+                for i, found_id in enumerate(ids)
+            }
+        except Exception as e:
+            print(f"Error retrieving documents: {e}")
+            return {}
+
+    def get_document_embeddings_batch(self, doc_ids: List[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Fetch the stored embeddings of several documents in one call
+        
+        Args:
+            doc_ids: Document identifiers
+            
+        Returns:
+            Tuple of (IDs found, in request order; (K, D) float32 array of
+            their embeddings). Unknown and repeated IDs are skipped.
+        """
+        # Chroma rejects empty and duplicate ID lists
+        doc_ids = list(dict.fromkeys(doc_ids))
+        if not doc_ids:
+            return [], np.zeros((0, 0), dtype=np.float32)
+
+        try:
+            results = self.collection.get(ids=doc_ids, include=["embeddings"])
+            ids = results.get("ids") or []
+            embeddings = results.get("embeddings")
+            if not ids or embeddings is None:
+                return [], np.zeros((0, 0), dtype=np.float32)
+
+            # Chroma does not guarantee the order of the returned rows
+            row_by_id = {doc_id: i for i, doc_id in enumerate(ids)}
+            found = [doc_id for doc_id in doc_ids if doc_id in row_by_id]
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            return found, matrix[[row_by_id[doc_id] for doc_id in found]]
+        except Exception as e:
+            print(f"Error retrieving embeddings: {e}")
+            return [], np.zeros((0, 0), dtype=np.float32)
+    
     def delete_document(self, doc_id: str) -> bool:
         """Delete a document from the collection.
 
@@ -159,26 +483,44 @@ class ChromaDBManager:
         """
         try:
             self.collection.delete(ids=[doc_id])
+            self._bump_version()
             return True
         except Exception as e:
             print(f"Error deleting document: {e}")
             return False
 
-    def list_document_ids(self) -> List[str]:
-        """Return a list of all document IDs stored in the collection."""
-        try:
-            results = self.collection.get()
+    def iter_document_ids(self, batch_size: int = 10_000) -> Iterator[str]:
+        """
+        Stream all document IDs stored in the collection, page by page
+        
+        Each page is fetched with ``include=[]`` so Chroma only returns IDs,
+        never documents, metadatas or embeddings.
+        
+        Args:
+            batch_size: Number of IDs fetched per Chroma call
+            
+        Yields:
+            Document identifiers
+        """
+        offset = 0
+        while True:
+            results = self.collection.get(include=[], limit=batch_size, offset=offset)
             ids = results.get("ids") or []
 
             # Chroma may return a flat list or a list-of-lists depending on version.
             if ids and isinstance(ids[0], list):
-                # Flatten one level if needed
-                flat_ids: List[str] = []
-                for chunk in ids:
-                    flat_ids.extend(chunk)
-                return flat_ids
+                ids = [doc_id for chunk in ids for doc_id in chunk]
+
+            yield from ids
 
-            return list(ids)
+            if len(ids) < batch_size:
+                return
+            offset += len(ids)
+
+    def list_document_ids(self) -> List[str]:
+        """Return a list of all document IDs stored in the collection."""
+        try:
+            return list(self.iter_document_ids())
         except Exception as e:
             print(f"Error listing documents: {e}")
             return []
@@ -187,23 +529,32 @@ class ChromaDBManager:
         """
         Get the total number of documents in the collection
         
+        Always read from ChromaDB, so the value is correct across
+        processes sharing the store. /stats serves it from its
+        background-refreshed cache rather than per request.
+        
         Returns:
-            Document count
+            Document count, or the last count read successfully (0 if
+            none) when ChromaDB raises
         """
         try:
-            return self.collection.count()
+            self._last_count = self.collection.count()
         except Exception as e:
             print(f"Error counting documents: {e}")
-            return 0
+        return self._last_count
 
 
 # Global instance
 _chroma_db = None
+_chroma_db_lock = threading.Lock()
 
 
 def get_chroma_db() -> ChromaDBManager:
     """Get the singleton ChromaDB manager instance"""
     global _chroma_db
     if _chroma_db is None:
-        _chroma_db = ChromaDBManager()
+        # Endpoints run on worker threads; only one may create the manager
+        with _chroma_db_lock:
+            if _chroma_db is None:
+                _chroma_db = ChromaDBManager()
     return _chroma_db
@@ -1,66 +1,313 @@
 """
 Graph Database Module
-Handles graph operations using NetworkX with pickle persistence
+Handles graph operations using NetworkX with JSON Lines persistence
 """
 import networkx as nx
+import numpy as np
+import atexit
+import orjson
 import pickle
 import os
-from typing import List, Set, Dict, Any
-from collections import deque
+import stat
+import tempfile
+import threading
+from typing import List, Set, Dict, Any, Optional, Tuple
+
+try:  # Numba is optional; traversals fall back to pure Python without it.
+    import numba  # type: ignore
+except Exception:  # pragma: no cover - import error handled at runtime
+    numba = None  # type: ignore
+
+
+def _bfs_csr(indptr: np.ndarray, indices: np.ndarray, start_idx: int, depth: int) -> np.ndarray:
+    """
+    Breadth-first search over CSR adjacency arrays
+    
+    Every node is enqueued at most once, so a flat int32 array of size N
+    serves as the queue; each BFS level is the slice added while the
+    previous level was being drained.
+    
+    Args:
+        indptr: CSR row pointer array (N + 1)
+        indices: CSR column index array
+        start_idx: Index of the start node
+        depth: Maximum traversal depth
+        
+    Returns:
+        Indices of the reached nodes in BFS order, excluding the start node
+    """
+    n = indptr.shape[0] - 1
+    visited = np.zeros(n, dtype=np.uint8)
+    queue = np.empty(n, dtype=np.int32)
+    
+    visited[start_idx] = 1
+    queue[0] = start_idx
+    head = 0
+    tail = 1
+    
+    for _ in range(depth):
+        level_end = tail
+        if head == level_end:
+            break
+        while head < level_end:
+            u = queue[head]
+            head += 1
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                if visited[v] == 0:
+                    visited[v] = 1
+                    queue[tail] = v
+                    tail += 1
+    
+    return queue[1:tail].copy()
+
+
+# Compiled lazily on first call and cached on disk across processes
+_bfs_csr_jit = numba.njit(cache=True)(_bfs_csr) if numba is not None else None
+
+
+# Coalescing of graph saves: a scheduled save is written after at most
+# this many seconds, or immediately once this many saves are pending.
+_SAVE_INTERVAL = float(os.getenv("GRAPH_SAVE_INTERVAL", "2.0"))
+_SAVE_EVERY = int(os.getenv("GRAPH_SAVE_EVERY", "100"))
+
+# Process umask, read once at import: os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 class GraphDBManager:
     """Manager for NetworkX graph operations"""
     
-    def __init__(self, persist_path: str = "./data/graph_store.pkl"):
+    def __init__(
+        self,
+        persist_path: str = "./data/graph_store.jsonl",
+        save_interval: float = _SAVE_INTERVAL,
+        save_every: int = _SAVE_EVERY
+    ):
         """
         Initialize graph database
         
         Args:
-            persist_path: Path to pickle file for persistence
+            persist_path: Path to JSON Lines file for persistence. A ``.pkl``
+                path is read as a legacy pickle and saved next to it as ``.jsonl``
+            save_interval: Maximum delay in seconds before a scheduled save
+            save_every: Number of pending saves that forces an immediate write
         """
+        # A path to an old pickle store is read once and migrated to a JSON
+        # Lines file next to it; the pickle itself is never overwritten
+        if persist_path.endswith(".pkl"):
+            persist_path = os.path.splitext(persist_path)[0] + ".jsonl"
         self.persist_path = persist_path
         self.graph = self.load_graph()
+        
+        # Guards graph mutations, adjacency reads and save snapshots, since
+        # requests and scheduled saves run on worker threads
+        self._lock = threading.RLock()
+        
+        # Pending scheduled saves and the timer that will flush them.
+        # _save_lock only guards this bookkeeping and is never held during
+        # a write; _write_lock lets one save run at a time.
+        self.save_interval = save_interval
+        self.save_every = save_every
+        self._save_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending_saves = 0
+        self._save_timer: Optional[threading.Timer] = None
+        atexit.register(self.force_flush)
+        
+        # CSR snapshot of the adjacency used for traversals:
+        # (node_to_idx, idx_to_node, indptr, indices). Rebuilt lazily
+        # after any structural mutation.
+        self._csr: Optional[Tuple[Dict[str, int], List[str], np.ndarray, np.ndarray]] = None
+        self._csr_dirty = True
+        
+        # Node-type views and edge total, maintained incrementally so hot
+        # paths don't read per-node attribute dicts
+        self._doc_nodes: Set[str] = set()
+        self._entity_nodes: Set[str] = set()
+        for node, attrs in self.graph.nodes(data=True):
+            if attrs.get('node_type') == 'document':
+                self._doc_nodes.add(node)
+            elif attrs.get('node_type') == 'entity':
+                self._entity_nodes.add(node)
+        self._edge_count = self.graph.number_of_edges()
+    
+    @property
+    def legacy_pickle_path(self) -> str:
+        """Path of the pickle file used by older versions of the store"""
+        return os.path.splitext(self.persist_path)[0] + ".pkl"
     
     def load_graph(self) -> nx.Graph:
         """
-        Load graph from pickle file if exists, otherwise create new graph
+        Load graph from the JSON Lines file if exists, otherwise create new graph
+        
+        Each line is either ``["n", node_id, attrs]`` or
+        ``["e", node1, node2, attrs]``. Nodes and edges are collected first
+        and inserted with one ``add_nodes_from``/``add_edges_from`` call
+        each. A legacy pickle file is still read if no JSON Lines file
+        exists yet (or if the store file itself holds a pickle); the next
+        save migrates it.
         
         Returns:
             NetworkX Graph instance
+            
+        Raises:
+            RuntimeError: If a store file exists but cannot be read. Starting
+                with an empty graph would overwrite it on the next save.
         """
         if os.path.exists(self.persist_path):
-            try:
-                with open(self.persist_path, 'rb') as f:
-                    graph = pickle.load(f)
-                print(f"Graph loaded from {self.persist_path}")
-                return graph
-            except Exception as e:
-                print(f"Error loading graph: {e}. Creating new graph.")
-                return nx.Graph()
+            path = self.persist_path
+        elif os.path.exists(self.legacy_pickle_path):
+            path = self.legacy_pickle_path
         else:
             print("No existing graph found. Creating new graph.")
             return nx.Graph()
+        
+        try:
+            with open(path, 'rb') as f:
+                # Pickles written with protocol 2+ start with the PROTO opcode
+                if f.read(1) == b'\x80':
+                    f.seek(0)
+                    graph = pickle.load(f)
+                    print(f"Graph loaded from legacy pickle {path}")
+                    return graph
+                
+                f.seek(0)
+                nodes = []
+                edges = []
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = orjson.loads(line)
+                    if record[0] == "n":
+                        nodes.append((record[1], record[2]))
+                    else:
+                        edges.append((record[1], record[2], record[3]))
+            
+            graph = nx.Graph()
+            graph.add_nodes_from(nodes)
+            graph.add_edges_from(edges)
+            print(f"Graph loaded from {path}")
+            return graph
+        except Exception as e:
+            print(f"Error loading graph from {path}: {e}")
+            raise RuntimeError(
+                f"Could not load graph from {path}; refusing to start with an "
+                "empty graph that would overwrite it"
+            ) from e
     
     def save_graph(self) -> bool:
         """
-        Save graph to pickle file
+        Save graph to the JSON Lines file atomically
+        
+        The graph is snapshotted under the lock, written to a temporary
+        file, fsynced, and then moved over the previous file, so a crash
+        mid-write never leaves a truncated store behind.
         
         Returns:
             True if successful
         """
         try:
             # Ensure directory exists
-            os.makedirs(os.path.dirname(self.persist_path), exist_ok=True)
+            persist_dir = os.path.dirname(self.persist_path) or "."
+            os.makedirs(persist_dir, exist_ok=True)
             
-            with open(self.persist_path, 'wb') as f:
-                pickle.dump(self.graph, f)
+            with self._lock:
+                nodes = [(node, dict(attrs)) for node, attrs in self.graph.nodes(data=True)]
+                edges = [(node1, node2, dict(attrs)) for node1, node2, attrs in self.graph.edges(data=True)]
+            
+            # A temp file unique to this writer: other workers or managers
+            # saving the same store never write into it
+            fd, tmp_path = tempfile.mkstemp(
+                dir=persist_dir,
+                prefix=os.path.basename(self.persist_path) + ".",
+                suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.writelines(
+                        orjson.dumps(["n", node, attrs], option=orjson.OPT_APPEND_NEWLINE)
+                        for node, attrs in nodes
+                    )
+                    f.writelines(
+                        orjson.dumps(["e", node1, node2, attrs], option=orjson.OPT_APPEND_NEWLINE)
+                        for node1, node2, attrs in edges
+                    )
+                    f.flush()
+                    os.fsync(f.fileno())
+                
+                # mkstemp creates the file 0600 and os.replace keeps that
+                # mode; keep the store's existing mode, or the umask default
+                try:
+                    mode = stat.S_IMODE(os.stat(self.persist_path).st_mode)
+                except FileNotFoundError:
+                    mode = 0o666 & ~_UMASK
+                os.chmod(tmp_path, mode)
+                
+                os.replace(tmp_path, self.persist_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
             
             return True
         except Exception as e:
             print(f"Error saving graph: {e}")
             return False
     
+    def schedule_save(self) -> None:
+        """
+        Request that the graph be persisted soon
+        
+        Saves are coalesced: the graph is written once ``save_interval``
+        seconds after the first pending request, or immediately once
+        ``save_every`` requests are pending, whichever comes first. The
+        write always happens on the timer thread, never the caller's.
+        """
+        with self._save_lock:
+            self._pending_saves += 1
+            if self._pending_saves == self.save_every:
+                self._arm_save_timer(0)
+            elif self._save_timer is None:
+                self._arm_save_timer(self.save_interval)
+    
+    def _arm_save_timer(self, delay: float) -> None:
+        """(Re)start the timer that flushes pending saves; needs _save_lock"""
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        self._save_timer = threading.Timer(delay, self.force_flush)
+        self._save_timer.daemon = True
+        self._save_timer.start()
+    
+    def force_flush(self) -> bool:
+        """
+        Write any pending scheduled save now
+        
+        Waits for a save already in progress. If the save fails, the
+        pending saves are restored and retried after ``save_interval``.
+        
+        Returns:
+            True if nothing was pending or the save succeeded
+        """
+        with self._write_lock:
+            with self._save_lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                pending = self._pending_saves
+                self._pending_saves = 0
+            
+            if pending == 0:
+                return True
+            
+            success = self.save_graph()
+            
+            if not success:
+                with self._save_lock:
+                    self._pending_saves += pending
+                    self._arm_save_timer(self.save_interval)
+            return success
+    
     def add_document_node(self, doc_id: str, **attributes) -> bool:
         """
         Add a document node to the graph
@@ -73,8 +320,12 @@ class GraphDBManager:
             True if successful
         """
         try:
-            self.graph.add_node(doc_id, node_type='document', **attributes)
-            return True
+            with self._lock:
+                self.graph.add_node(doc_id, node_type='document', **attributes)
+                self._entity_nodes.discard(doc_id)
+                self._doc_nodes.add(doc_id)
+                self._csr_dirty = True
+                return True
         except Exception as e:
             print(f"Error adding document node: {e}")
             return False
@@ -91,8 +342,12 @@ class GraphDBManager:
             True if successful
         """
         try:
-            self.graph.add_node(entity, node_type='entity', **attributes)
-            return True
+            with self._lock:
+                self.graph.add_node(entity, node_type='entity', **attributes)
+                self._doc_nodes.discard(entity)
+                self._entity_nodes.add(entity)
+                self._csr_dirty = True
+                return True
         except Exception as e:
             print(f"Error adding entity node: {e}")
             return False
@@ -110,12 +365,86 @@ class GraphDBManager:
             True if successful
         """
         try:
-            self.graph.add_edge(node1, node2, **attributes)
-            return True
+            with self._lock:
+                is_new = not self.graph.has_edge(node1, node2)
+                self.graph.add_edge(node1, node2, **attributes)
+                if is_new:
+                    self._edge_count += 1
+                self._csr_dirty = True
+                return True
         except Exception as e:
             print(f"Error adding edge: {e}")
             return False
     
+    def add_document_subgraph(
+        self,
+        doc_id: str,
+        entities: List[str],
+        edge_attrs: Optional[Dict[str, Any]] = None,
+        **attributes
+    ) -> bool:
+        """
+        Add a document node, its entity nodes and the edges between them
+        
+        Equivalent to add_document_node, then add_entity_node and
+        add_edge_between per entity, but done with one bulk
+        ``add_nodes_from``/``add_edges_from`` call per kind.
+        
+        Args:
+            doc_id: Document identifier
+            entities: Entity identifiers linked to the document
+            edge_attrs: Attributes set on every document-entity edge
+            **attributes: Additional document node attributes
+            
+        Returns:
+            True if successful
+        """
+        try:
+            with self._lock:
+                self.graph.add_nodes_from([(doc_id, {'node_type': 'document', **attributes})])
+                self._entity_nodes.discard(doc_id)
+                self._doc_nodes.add(doc_id)
+                
+                self.graph.add_nodes_from((entity, {'node_type': 'entity'}) for entity in entities)
+                self._doc_nodes.difference_update(entities)
+                self._entity_nodes.update(entities)
+                
+                new_edges = {entity for entity in entities if not self.graph.has_edge(doc_id, entity)}
+                self.graph.add_edges_from((doc_id, entity, edge_attrs or {}) for entity in entities)
+                self._edge_count += len(new_edges)
+                
+                self._csr_dirty = True
+                return True
+        except Exception as e:
+            print(f"Error adding document subgraph: {e}")
+            return False
+    
+    def _rebuild_csr(self) -> None:
+        """
+        Flatten the adjacency into CSR arrays for fast traversal
+        
+        Each node gets an index 0..N-1 in graph order; the neighbors of
+        node ``i`` are ``indices[indptr[i]:indptr[i + 1]]``, in the same
+        order NetworkX reports them.
+        """
+        adj = self.graph.adj
+        idx_to_node = list(self.graph.nodes())
+        node_to_idx = {n: i for i, n in enumerate(idx_to_node)}
+        
+        indptr = np.zeros(len(idx_to_node) + 1, dtype=np.int32)
+        indptr[1:] = np.cumsum(
+            np.fromiter((len(adj[n]) for n in idx_to_node), dtype=np.int32, count=len(idx_to_node))
+        )
+        indices = np.fromiter(
+            (node_to_idx[nbr] for n in idx_to_node for nbr in adj[n]),
+            dtype=np.int32,
+            count=int(indptr[-1])
+        )
+        
+        # Swap the snapshot in one assignment so readers never see a mix
+        self._csr = (node_to_idx, idx_to_node, indptr, indices)
+        self._csr_dirty = False
+    
     def get_neighbors(self, node: str, depth: int = 1) -> List[str]:
         """
         Get neighbors of a node up to specified depth using BFS
@@ -125,34 +454,49 @@ class GraphDBManager:
             depth: Maximum traversal depth
             
         Returns:
-            List of neighbor node identifiers
+            List of neighbor node identifiers, in BFS order
         """
-        if node not in self.graph:
-            return []
-        
-        visited = set()
-        queue = deque([(node, 0)])
-        neighbors = []
-        
-        while queue:
-            current_node, current_depth = queue.popleft()
+        with self._lock:
+            if node not in self.graph:
+                return []
             
-            if current_node in visited:
-                continue
+            # Depth 1 is just the adjacency; no BFS or CSR snapshot needed
+            if depth == 1:
+                return [n for n in self.graph.neighbors(node) if n != node]
             
-            visited.add(current_node)
+            if self._csr_dirty or self._csr is None:
+                self._rebuild_csr()
+            node_to_idx, idx_to_node, indptr, indices = self._csr
+        
+        start = node_to_idx[node]
+        
+        if _bfs_csr_jit is not None:
+            found = _bfs_csr_jit(indptr, indices, start, depth).tolist()
+            return [idx_to_node[i] for i in found]
+        
+        visited = bytearray(len(idx_to_node))
+        visited[start] = 1
+        
+        frontier = [start]
+        found = []
+        
+        # Level-synchronous BFS over the CSR arrays
+        for _ in range(depth):
+            next_frontier: List[int] = []
+            next_frontier_append = next_frontier.append
+            for u in frontier:
+                for v in indices[indptr[u]:indptr[u + 1]].tolist():
+                    if not visited[v]:
+                        visited[v] = 1
+                        next_frontier_append(v)
             
-            # Don't include the starting node itself
-            if current_node != node:
-                neighbors.append(current_node)
+            if not next_frontier:
+                break
             
-            # Continue BFS if we haven't reached max depth
-            if current_depth < depth:
-                for neighbor in self.graph.neighbors(current_node):
-                    if neighbor not in visited:
-                        queue.append((neighbor, current_depth + 1))
+            found.extend(next_frontier)
+            frontier = next_frontier
         
-        return neighbors
+        return [idx_to_node[i] for i in found]
     
     def get_all_nodes(self) -> List[str]:
         """
@@ -161,7 +505,8 @@ class GraphDBManager:
         Returns:
             List of all node identifiers
         """
-        return list(self.graph.nodes())
+        with self._lock:
+            return list(self.graph.nodes())
     
     def get_node_attributes(self, node: str) -> Dict[str, Any]:
         """
@@ -173,9 +518,10 @@ class GraphDBManager:
         Returns:
             Dictionary of node attributes
         """
-        if node in self.graph:
-            return dict(self.graph.nodes[node])
-        return {}
+        with self._lock:
+            if node in self.graph:
+                return dict(self.graph.nodes[node])
+            return {}
     
     def get_document_entities(self, doc_id: str) -> List[str]:
         """
@@ -187,16 +533,13 @@ class GraphDBManager:
         Returns:
             List of entity identifiers
         """
-        if doc_id not in self.graph:
-            return []
-        
-        entities = []
-        for neighbor in self.graph.neighbors(doc_id):
-            node_attrs = self.graph.nodes[neighbor]
-            if node_attrs.get('node_type') == 'entity':
-                entities.append(neighbor)
-        
-        return entities
+        # Check and read under one lock hold, so a concurrent delete can't
+        # remove the node in between
+        with self._lock:
+            if doc_id not in self.graph:
+                return []
+            entity_nodes = self._entity_nodes
+            return [n for n in self.graph.neighbors(doc_id) if n in entity_nodes]
     
     def get_related_documents(self, entity: str) -> List[str]:
         """
@@ -208,16 +551,11 @@ class GraphDBManager:
         Returns:
             List of document identifiers
         """
-        if entity not in self.graph:
-            return []
-        
-        documents = []
-        for neighbor in self.graph.neighbors(entity):
-            node_attrs = self.graph.nodes[neighbor]
-            if node_attrs.get('node_type') == 'document':
-                documents.append(neighbor)
-        
-        return documents
+        with self._lock:
+            if entity not in self.graph:
+                return []
+            doc_nodes = self._doc_nodes
+            return [n for n in self.graph.neighbors(entity) if n in doc_nodes]
 
     def delete_document_node(self, doc_id: str) -> bool:
         """Delete a document node and its incident edges from the graph.
@@ -226,22 +564,27 @@ class GraphDBManager:
         connections after the document is removed.
         """
         try:
-            if doc_id not in self.graph:
-                return False
+            with self._lock:
+                if doc_id not in self.graph:
+                    return False
 
-            # Track neighboring entity nodes so we can clean up orphans
-            neighbors = list(self.graph.neighbors(doc_id))
+                # Track neighboring entity nodes so we can clean up orphans
+                neighbors = list(self.graph.neighbors(doc_id))
 
-            # Remove the document node (edges are removed implicitly)
-            self.graph.remove_node(doc_id)
+                # Remove the document node (edges are removed implicitly)
+                self.graph.remove_node(doc_id)
+                self._doc_nodes.discard(doc_id)
+                self._entity_nodes.discard(doc_id)
+                self._edge_count -= len(neighbors)
+                self._csr_dirty = True
 
-            # Remove orphaned entities (no remaining degree)
-            for neighbor in neighbors:
-                attrs = self.graph.nodes.get(neighbor, {})
-                if attrs.get("node_type") == "entity" and self.graph.degree(neighbor) == 0:
-                    self.graph.remove_node(neighbor)
+                # Remove orphaned entities (no remaining degree)
+                for neighbor in neighbors:
+                    if neighbor in self._entity_nodes and self.graph.degree(neighbor) == 0:
+                        self.graph.remove_node(neighbor)
+                        self._entity_nodes.discard(neighbor)
 
-            return True
+                return True
         except Exception as e:
             print(f"Error deleting document node from graph: {e}")
             return False
@@ -256,7 +599,8 @@ class GraphDBManager:
         Returns:
             True if node exists
         """
-        return node in self.graph
+        with self._lock:
+            return node in self.graph
     
     def get_graph_stats(self) -> Dict[str, int]:
         """
@@ -267,21 +611,23 @@ class GraphDBManager:
         """
         return {
             "total_nodes": self.graph.number_of_nodes(),
-            "total_edges": self.graph.number_of_edges(),
-            "document_nodes": sum(1 for _, attrs in self.graph.nodes(data=True) 
-                                 if attrs.get('node_type') == 'document'),
-            "entity_nodes": sum(1 for _, attrs in self.graph.nodes(data=True) 
-                               if attrs.get('node_type') == 'entity')
+            "total_edges": self._edge_count,
+            "document_nodes": len(self._doc_nodes),
+            "entity_nodes": len(self._entity_nodes)
         }
 
 
 # Global instance
 _graph_db = None
+_graph_db_lock = threading.Lock()
 
 
 def get_graph_db() -> GraphDBManager:
     """Get the singleton graph database manager instance"""
     global _graph_db
     if _graph_db is None:
-        _graph_db = GraphDBManager()
+        # Endpoints run on worker threads; only one may create the manager
+        with _graph_db_lock:
+            if _graph_db is None:
+                _graph_db = GraphDBManager()
     return _graph_db
@@ -2,22 +2,24 @@
 FastAPI Application - Hybrid Vector + Graph AI Retrieval Engine
 Main application with REST API endpoints
 """
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any, List
-import time
+import asyncio
+import itertools
+
+import anyio
+import orjson
 
 from backend.services.ingest_service import ingest_document, batch_ingest_documents
-from backend.services.search_service import semantic_search, search_by_document_id
+from backend.services.search_service import semantic_search, semantic_search_batch, search_by_document_id
 from backend.services.hybrid_service import hybrid_search, graph_neighbors, get_document_relationships
 from backend.services.delete_service import delete_document as delete_document_service
-from backend.db.graph_db import get_graph_db
-from backend.db.chroma_db import get_chroma_db
+from backend.db.graph_db import GraphDBManager, get_graph_db
+from backend.db.chroma_db import ChromaDBManager, get_chroma_db
+from models.embedding_model import generate_embedding
 
 
 # Pydantic models for request/response validation
@@ -31,11 +33,19 @@ class BatchDocumentRequest(BaseModel):
     documents: List[DocumentRequest] = Field(..., description="List of documents to ingest")
 
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=50, description="List of search query texts")
+    top_k: int = Field(5, ge=1, le=50, description="Number of results to return per query")
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Hybrid Vector + Graph AI Retrieval Engine",
     description="Backend system combining semantic search (ChromaDB) with graph reasoning (NetworkX)",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes responses several times faster than the stdlib
+    # encoder
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -48,6 +58,41 @@ app.add_middleware(
 )
 
 
+# Endpoints that touch ChromaDB, NetworkX, spaCy or the embedding model are
+# plain ``def`` so FastAPI runs them in its worker threadpool instead of
+# blocking the event loop. The pool is enlarged from AnyIO's default of 40.
+_THREADPOOL_SIZE = 64
+
+
+@app.on_event("startup")
+def configure_threadpool():
+    """Size the threadpool used for the synchronous endpoints"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = _THREADPOOL_SIZE
+
+
+@app.on_event("startup")
+def init_stores():
+    """Create the database managers once and warm them up
+
+    Loading the embedding model and issuing one vector query here moves
+    cold-start costs out of the first real request.
+    """
+    chroma_db = get_chroma_db()
+    get_graph_db()
+
+    try:
+        generate_embedding("warmup")
+        chroma_db.warmup()
+    except Exception as e:
+        print(f"Warning: startup warmup failed: {e}")
+
+
+@app.on_event("shutdown")
+def flush_graph_on_shutdown():
+    """Write any graph changes still waiting for a coalesced save"""
+    get_graph_db().force_flush()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -58,6 +103,7 @@ async def root():
             "POST /add_document": "Ingest a new document",
             "POST /add_documents": "Batch ingest multiple documents",
             "GET /search": "Semantic vector search",
+            "POST /search_batch": "Semantic vector search for multiple queries",
             "GET /hybrid": "Hybrid search (vector + graph)",
             "GET /graph_neighbors": "Get graph neighbors for a document",
             "GET /document/{doc_id}": "Retrieve a specific document",
@@ -70,7 +116,7 @@ async def root():
 
 
 @app.post("/add_document")
-async def add_document(doc_request: DocumentRequest):
+def add_document(doc_request: DocumentRequest):
     """
     Ingest a new document into the system
     
@@ -93,7 +139,7 @@ async def add_document(doc_request: DocumentRequest):
 
 
 @app.post("/add_documents")
-async def add_documents(batch_request: BatchDocumentRequest):
+def add_documents(batch_request: BatchDocumentRequest):
     """
     Batch ingest multiple documents
     """
@@ -103,7 +149,7 @@ async def add_documents(batch_request: BatchDocumentRequest):
 
 
 @app.get("/search")
-async def search(
+def search(
     q: str = Query(..., description="Search query text"),
     top_k: int = Query(5, ge=1, le=50, description="Number of results to return")
 ):
@@ -125,8 +171,26 @@ async def search(
         raise HTTPException(status_code=500, detail=result.get("error", "Search failed"))
 
 
+@app.post("/search_batch")
+def search_batch(batch_request: BatchSearchRequest):
+    """
+    Perform semantic vector search for multiple queries in one request
+    
+    All query embeddings are sent to ChromaDB in a single query call.
+    """
+    if any(not q or not q.strip() for q in batch_request.queries):
+        raise HTTPException(status_code=400, detail="Queries cannot be empty")
+    
+    result = semantic_search_batch(queries=batch_request.queries, top_k=batch_request.top_k)
+    
+    if result["success"]:
+        return result
+    else:
+        raise HTTPException(status_code=500, detail=result.get("error", "Batch search failed"))
+
+
 @app.get("/hybrid")
-async def hybrid(
+def hybrid(
     q: str = Query(..., description="Search query text"),
     top_k: int = Query(5, ge=1, le=20, description="Number of initial vector results"),
     depth: int = Query(1, ge=1, le=3, description="Graph traversal depth")
@@ -151,7 +215,7 @@ async def hybrid(
 
 
 @app.get("/graph_neighbors")
-async def get_graph_neighbors(
+def get_graph_neighbors(
     doc_id: str = Query(..., description="Document identifier"),
     depth: int = Query(1, ge=1, le=3, description="Maximum traversal depth")
 ):
@@ -171,14 +235,18 @@ async def get_graph_neighbors(
 
 
 @app.get("/document/{doc_id}")
-async def get_document(doc_id: str):
+def get_document(
+    doc_id: str,
+    with_embedding: bool = Query(False, description="Include the stored embedding vector")
+):
     """
     Retrieve a specific document by ID
     
     Args:
         doc_id: Document identifier
+        with_embedding: Also return the stored embedding vector
     """
-    result = search_by_document_id(doc_id)
+    result = search_by_document_id(doc_id, include_embedding=with_embedding)
     
     if result["success"] and result["found"]:
         return result
@@ -189,7 +257,7 @@ async def get_document(doc_id: str):
 
 
 @app.get("/relationships/{doc_id}")
-async def get_relationships(doc_id: str):
+def get_relationships(doc_id: str):
     """
     Get detailed relationship information for a document
     
@@ -205,7 +273,7 @@ async def get_relationships(doc_id: str):
 
 
 @app.delete("/document/{doc_id}")
-async def delete_document(doc_id: str):
+def delete_document(doc_id: str):
     """Delete a specific document from both ChromaDB and the graph."""
     result = delete_document_service(doc_id)
 
@@ -223,67 +291,112 @@ async def delete_document(doc_id: str):
 
 
 @app.get("/list_documents")
-async def list_documents():
-    """Return a list of all stored document IDs from ChromaDB."""
+def list_documents():
+    """Stream the list of all stored document IDs from ChromaDB.
+
+    IDs are read from Chroma page by page and written to the response as
+    they arrive, so the full ID list is never held in memory. The body is
+    the same JSON object as before, with ``count`` emitted last.
+    """
     try:
-        chroma_db = get_chroma_db()
-        doc_ids = chroma_db.list_document_ids()
-        return {
-            "success": True,
-            "count": len(doc_ids),
-            "documents": doc_ids,
-        }
+        doc_ids = get_chroma_db().iter_document_ids()
+        # Pull the first ID eagerly so storage errors still map to a 500
+        first_ids = list(itertools.islice(doc_ids, 1))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list documents: {str(e)}")
 
+    def body():
+        count = 0
+        yield b'{"success":true,"documents":['
+        for doc_id in itertools.chain(first_ids, doc_ids):
+            if count:
+                yield b","
+            yield orjson.dumps(doc_id)
+            count += 1
+        yield b'],"count":' + str(count).encode() + b"}"
+
+    return StreamingResponse(body(), media_type="application/json")
 
-# Simple in-process cache for expensive /stats computation.
-# This does NOT change how often clients can hit /stats, but limits
-# how often we actually touch ChromaDB and the graph. Adjust TTL
-# (in seconds) as needed, e.g. 5.0 or 10.0.
+
+# In-process cache for /stats, refreshed by a background task every
+# _STATS_CACHE_TTL seconds. Requests always read the cached value, so no
+# request ever pays for the computation after startup.
 _STATS_CACHE: Optional[Dict[str, Any]] = None
-_STATS_CACHE_LAST: float = 0.0
 _STATS_CACHE_TTL: float = 5.0  # seconds
+_STATS_REFRESH_LOCK = asyncio.Lock()
 
 
-@app.get("/stats")
-async def get_stats():
-    """Get system statistics with simple caching.
+def _compute_stats(chroma_db: ChromaDBManager, graph_db: GraphDBManager) -> Dict[str, Any]:
+    """Collect system statistics from ChromaDB and the graph."""
+    return {
+        "success": True,
+        "chromadb": {
+            "total_documents": chroma_db.count_documents()
+        },
+        "graph": graph_db.get_graph_stats(),
+        "system": {
+            "status": "operational"
+        }
+    }
+
 
-    To avoid hammering the database/graph when /stats is polled very
-    frequently (e.g., by a dashboard), we cache the result for a short
-    TTL and return the cached value until it expires.
+async def _refresh_stats() -> None:
+    """Recompute the /stats cache off the event loop.
+
+    Concurrent callers are coalesced: if a refresh is already running,
+    wait for it and reuse its result instead of computing again.
     """
-    global _STATS_CACHE, _STATS_CACHE_LAST
+    global _STATS_CACHE
 
-    now = time.time()
-    if _STATS_CACHE is not None and (now - _STATS_CACHE_LAST) < _STATS_CACHE_TTL:
-        return _STATS_CACHE
+    if _STATS_REFRESH_LOCK.locked():
+        async with _STATS_REFRESH_LOCK:
+            return
 
-    try:
-        graph_db = get_graph_db()
-        chroma_db = get_chroma_db()
-
-        graph_stats = graph_db.get_graph_stats()
-        chroma_count = chroma_db.count_documents()
-
-        result = {
-            "success": True,
-            "chromadb": {
-                "total_documents": chroma_count
-            },
-            "graph": graph_stats,
-            "system": {
-                "status": "operational"
-            }
-        }
+    async with _STATS_REFRESH_LOCK:
+        _STATS_CACHE = await asyncio.to_thread(_compute_stats, get_chroma_db(), get_graph_db())
 
-        _STATS_CACHE = result
-        _STATS_CACHE_LAST = now
 
-        return result
+async def _stats_refresher() -> None:
+    """Background loop keeping the /stats cache fresh."""
+    while True:
+        await asyncio.sleep(_STATS_CACHE_TTL)
+        try:
+            await _refresh_stats()
+        except Exception as e:
+            print(f"Error refreshing stats: {e}")
+
+
+@app.on_event("startup")
+async def start_stats_refresher():
+    """Compute stats once, then keep refreshing them in the background."""
+    try:
+        await _refresh_stats()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
+        print(f"Error computing initial stats: {e}")
+    app.state.stats_task = asyncio.create_task(_stats_refresher())
+
+
+@app.on_event("shutdown")
+async def stop_stats_refresher():
+    """Stop the background stats refresh."""
+    app.state.stats_task.cancel()
+
+
+@app.get("/stats")
+async def get_stats():
+    """Get system statistics from the background-refreshed cache.
+
+    A dashboard may poll /stats very frequently; the value it gets is
+    at most _STATS_CACHE_TTL seconds old and is never computed on the
+    request path, except when no value exists yet.
+    """
+    if _STATS_CACHE is None:
+        try:
+            await _refresh_stats()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
+
+    return _STATS_CACHE
 
 
 @app.get("/health")
@@ -296,6 +409,7 @@ async def health_check():
 
 
 if __name__ == "__main__":
+    # Run from the project root with `python -m backend.main`
     import multiprocessing
     import uvicorn
     
@@ -0,0 +1,166 @@
+"""Semantic cache for AI relationship analyses
+
+`analyze_document_relationships` spends almost all of its time waiting on the
+LLM. Requests for near-duplicate documents over the same candidate set tend to
+produce the same analysis, so the adapted result is cached and keyed by:
+
+- the focus document's stored embedding (L2-normalized, compared by inner
+  product, i.e. cosine similarity), and
+- the exact set of candidate related doc_ids the analysis was run over.
+
+A lookup hits when an unexpired entry over the same candidate set scores at
+least `_SIMILARITY_THRESHOLD`. Entries expire after `_TTL_SECONDS`; when the
+cache is full the least recently used entry is replaced, and a new result that
+is a near-duplicate (>= `_DEDUPE_THRESHOLD`) of an existing one overwrites it
+instead of taking a new slot.
+
+The cache holds at most a few hundred vectors, so a flat numpy matrix and one
+matrix-vector product per lookup is as fast as a dedicated ANN index here.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+import copy
+import os
+import threading
+import time
+
+import numpy as np
+
+
+_SIMILARITY_THRESHOLD = float(os.getenv("RELATION_CACHE_THRESHOLD", "0.40"))
+_DEDUPE_THRESHOLD = 0.95
+_TTL_SECONDS = float(os.getenv("RELATION_CACHE_TTL", "3600"))
+_MAX_ENTRIES = int(os.getenv("RELATION_CACHE_SIZE", "500"))
+
+
+class _Entry:
+    __slots__ = ("expires_at", "last_access", "candidates", "result")
+
+    def __init__(self, expires_at: float, candidates: FrozenSet[str], result: Dict[str, Any]):
+        self.expires_at = expires_at
+        self.last_access = time.monotonic()
+        self.candidates = candidates
+        self.result = result
+
+
+class RelationCache:
+    """Fixed-capacity semantic cache of relationship analyses"""
+
+    def __init__(
+        self,
+        max_entries: int = _MAX_ENTRIES,
+        ttl: float = _TTL_SECONDS,
+        threshold: float = _SIMILARITY_THRESHOLD,
+        dedupe_threshold: float = _DEDUPE_THRESHOLD,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.threshold = threshold
+        self.dedupe_threshold = dedupe_threshold
+        self._lock = threading.Lock()
+        # One row per slot; allocated on first insert once the dimension is known
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Optional[_Entry]] = [None] * self.max_entries
+
+    @staticmethod
+    def _normalize(embedding: Any) -> Optional[np.ndarray]:
+        v = np.array(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(v)
+        if v.size == 0 or not np.isfinite(norm) or norm == 0:
+            return None
+        v /= norm
+        return v
+
+    def _scores(self, v: np.ndarray) -> Optional[np.ndarray]:
+        if self._vectors is None or self._vectors.shape[1] != v.shape[0]:
+            return None
+        return self._vectors @ v
+
+    def get(self, embedding: Any, candidate_doc_ids: Iterable[str], doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached analysis for a focus document
+
+        Args:
+            embedding: Focus document embedding
+            candidate_doc_ids: Candidate related documents of this request
+            doc_id: Focus document ID, written into the returned result
+
+        Returns:
+            Copy of the cached result, or None on a miss
+        """
+        v = self._normalize(embedding)
+        if v is None:
+            return None
+        candidates = frozenset(candidate_doc_ids)
+        now = time.monotonic()
+
+        result: Optional[Dict[str, Any]] = None
+        with self._lock:
+            scores = self._scores(v)
+            if scores is None:
+                return None
+            for slot in np.argsort(-scores):
+                if scores[slot] < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if entry is None or entry.expires_at <= now or entry.candidates != candidates:
+                    continue
+                entry.last_access = now
+                result = copy.deepcopy(entry.result)
+                break
+
+        if result is not None:
+            result["doc_id"] = doc_id
+        return result
+
+    def put(self, embedding: Any, candidate_doc_ids: Iterable[str], result: Dict[str, Any]) -> None:
+        """
+        Store an analysis for later lookups
+
+        Args:
+            embedding: Focus document embedding
+            candidate_doc_ids: Candidate related documents the analysis used
+            result: Adapted analysis result
+        """
+        v = self._normalize(embedding)
+        if v is None:
+            return
+        candidates = frozenset(candidate_doc_ids)
+        now = time.monotonic()
+        entry = _Entry(now + self.ttl, candidates, copy.deepcopy(result))
+
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != v.shape[0]:
+                # First insert, or the embedding model changed dimension
+                self._vectors = np.zeros((self.max_entries, v.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.max_entries
+
+            slot = self._pick_slot(self._vectors @ v, candidates, now)
+            self._vectors[slot] = v
+            self._entries[slot] = entry
+
+    def _pick_slot(self, scores: np.ndarray, candidates: FrozenSet[str], now: float) -> int:
+        # Overwrite a near-duplicate over the same candidates
+        for slot in np.flatnonzero(scores >= self.dedupe_threshold):
+            entry = self._entries[slot]
+            if entry is not None and entry.candidates == candidates:
+                return int(slot)
+
+        # Otherwise take a free or expired slot, else evict the LRU entry
+        lru_slot, lru_access = 0, float("inf")
+        for slot, entry in enumerate(self._entries):
+            if entry is None or entry.expires_at <= now:
+                return slot
+            if entry.last_access < lru_access:
+                lru_slot, lru_access = slot, entry.last_access
+        return lru_slot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors = None
+            self._entries = [None] * self.max_entries
+
+
+relation_cache = RelationCache()
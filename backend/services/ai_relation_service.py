@@ -22,18 +22,25 @@ callers should fall back to the legacy graph-based implementation.
 
 from __future__ import annotations
 
+from collections import Counter
 from typing import Any, Dict, List, Set
-import json
 
-from backend.db.chroma_db import get_chroma_db
+import numpy as np
+import orjson
+
+from backend.db.chroma_db import cosine_distances, get_chroma_db
 from backend.db.graph_db import get_graph_db
+from backend.services._relation_cache import relation_cache
 from backend.services.search_service import get_similar_documents
+from models.embedding_model import generate_embeddings_batch
 from models.llm_client import call_llm_for_json
 
 
 _MAX_FOCUS_CHARS = 3000
 _MAX_RELATED_DOCS = 8
 _MAX_RELATED_CHARS = 1500
+_FOCUS_CHUNK_CHARS = 500
+_FOCUS_CHUNK_SEPARATOR = "\n...\n"
 
 
 def _truncate(text: str, max_chars: int) -> str:
@@ -44,6 +51,58 @@ def _truncate(text: str, max_chars: int) -> str:
     return text[: max_chars - 3] + "..."
 
 
+def _split_chunks(text: str, chunk_chars: int) -> List[str]:
+    """Split text into consecutive pieces of roughly `chunk_chars`, on whitespace."""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for word in text.split():
+        if current and size + len(word) + 1 > chunk_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(word)
+        size += len(word) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _select_focus_text(focus_text: str, related_ids: List[str]) -> str:
+    """Fit a long focus document into the prompt budget.
+
+    Rather than keeping only the head of the document, split it into chunks
+    and keep those closest to the centroid of the related documents'
+    embeddings, in their original order. Falls back to plain truncation if
+    the document is short enough or anything goes wrong.
+    """
+    if len(focus_text) <= _MAX_FOCUS_CHARS:
+        return focus_text
+
+    try:
+        _, related_embeddings = get_chroma_db().get_document_embeddings_batch(related_ids)
+        chunks = _split_chunks(focus_text, _FOCUS_CHUNK_CHARS)
+        if len(related_embeddings) == 0 or len(chunks) < 2:
+            return _truncate(focus_text, _MAX_FOCUS_CHARS)
+
+        centroid = related_embeddings.mean(axis=0)
+        distances = cosine_distances(centroid, generate_embeddings_batch(chunks))
+
+        selected: List[int] = []
+        budget = _MAX_FOCUS_CHARS
+        for i in np.argsort(distances, kind="stable").tolist():
+            cost = len(chunks[i]) + (len(_FOCUS_CHUNK_SEPARATOR) if selected else 0)
+            if cost > budget:
+                continue
+            selected.append(i)
+            budget -= cost
+
+        if not selected:
+            return _truncate(focus_text, _MAX_FOCUS_CHARS)
+        return _FOCUS_CHUNK_SEPARATOR.join(chunks[i] for i in sorted(selected))
+    except Exception:
+        return _truncate(focus_text, _MAX_FOCUS_CHARS)
+
+
 def analyze_document_relationships(doc_id: str) -> Dict[str, Any]:
     """Run AI-based cross-document entity linking and relation extraction.
 
@@ -63,8 +122,8 @@ def analyze_document_relationships(doc_id: str) -> Dict[str, Any]:
     chroma_db = get_chroma_db()
     graph_db = get_graph_db()
 
-    # 1) Fetch focus document
-    focus_doc = chroma_db.get_document(doc_id)
+    # 1) Fetch focus document (its embedding keys the semantic cache)
+    focus_doc = chroma_db.get_document(doc_id, include_embedding=True)
     if not focus_doc or not focus_doc.get("document"):
         return {
             "success": False,
@@ -74,39 +133,54 @@ def analyze_document_relationships(doc_id: str) -> Dict[str, Any]:
 
     focus_text = str(focus_doc["document"])
 
-    # 2) Collect candidate related docs from graph via entities
-    candidate_doc_ids: Set[str] = set()
-
+    # 2) Collect candidate related docs from graph via entities, scored by
+    # the number of entities they share with the focus document
     entities_from_graph = graph_db.get_document_entities(doc_id)
-    for entity in entities_from_graph:
-        for rel_doc in graph_db.get_related_documents(entity):
-            if rel_doc != doc_id:
-                candidate_doc_ids.add(rel_doc)
-
-    # 3) Augment with semantic neighbors (if any)
+    graph_candidates = [
+        rel_doc
+        for entity in entities_from_graph
+        for rel_doc in graph_db.get_related_documents(entity)
+        if rel_doc != doc_id
+    ]
+    # Counter tallies in C; missing keys read as 0 for the semantic boosts below
+    candidate_scores: Dict[str, float] = Counter(graph_candidates)
+
+    # 3) Augment with semantic neighbors (if any), reusing the focus
+    # embedding fetched above
+    focus_embedding = focus_doc.get("embedding")
     try:
-        similar = get_similar_documents(doc_id, top_k=5)
+        similar = get_similar_documents(doc_id, top_k=5, embedding=focus_embedding)
         if similar.get("success"):
             for item in similar.get("results", []):
                 rel_id = item.get("doc_id")
                 if rel_id and rel_id != doc_id:
-                    candidate_doc_ids.add(rel_id)
+                    candidate_scores[rel_id] += 2.0 * float(item.get("relevance_score") or 0.0)
     except Exception:
         # If semantic similarity fails, we still proceed with graph-based candidates.
         pass
 
-    # 4) Fetch related documents (capped)
-    related_docs_payload: List[Dict[str, Any]] = []
-    for rel_id in list(candidate_doc_ids)[:_MAX_RELATED_DOCS]:
-        d = chroma_db.get_document(rel_id)
-        if not d or not d.get("document"):
-            continue
-        related_docs_payload.append(
-            {
-                "doc_id": rel_id,
-                "text": _truncate(str(d["document"]), _MAX_RELATED_CHARS),
-            }
-        )
+    # A near-duplicate focus document over the same candidates was already
+    # analyzed recently; reuse that instead of another LLM round-trip.
+    if focus_embedding is not None:
+        cached = relation_cache.get(focus_embedding, candidate_scores, doc_id)
+        if cached is not None:
+            return cached
+
+    # 4) Fetch the highest-scoring related documents (capped)
+    related_ids = sorted(candidate_scores, key=lambda d: (-candidate_scores[d], d))[:_MAX_RELATED_DOCS]
+    related_docs = chroma_db.get_documents_bulk(related_ids)
+    related_texts = [
+        (rel_id, str(related_docs[rel_id]["document"]))
+        for rel_id in related_ids
+        if rel_id in related_docs and related_docs[rel_id].get("document")
+    ]
+    related_docs_payload: List[Dict[str, Any]] = [
+        {
+            "doc_id": rel_id,
+            "text": text if len(text) <= _MAX_RELATED_CHARS else text[: _MAX_RELATED_CHARS - 3] + "...",
+        }
+        for rel_id, text in related_texts
+    ]
 
     # If there are no candidates at all, we can short-circuit to an empty
     # but successful structure.
@@ -127,7 +201,7 @@ def analyze_document_relationships(doc_id: str) -> Dict[str, Any]:
     llm_input = {
         "focus_document": {
             "doc_id": doc_id,
-            "text": _truncate(focus_text, _MAX_FOCUS_CHARS),
+            "text": _select_focus_text(focus_text, [d["doc_id"] for d in related_docs_payload]),
         },
         "related_documents": related_docs_payload,
     }
@@ -169,7 +243,7 @@ def analyze_document_relationships(doc_id: str) -> Dict[str, Any]:
         "    }\n"
         "  ]\n"
         "}\n\n"
-        "Here is the input JSON you should analyze:\n\n" + json.dumps(llm_input, ensure_ascii=False)
+        "Here is the input JSON you should analyze:\n\n" + orjson.dumps(llm_input).decode()
     )
 
     # 6) Call LLM and parse JSON
@@ -223,7 +297,7 @@ def analyze_document_relationships(doc_id: str) -> Dict[str, Any]:
         related_via_entities[ent_key] = sorted(doc_ids_for_entity)
         all_related_docs.update(doc_ids_for_entity)
 
-    return {
+    result = {
         "success": True,
         "doc_id": doc_id,
         "entities": canonical_entities,
@@ -235,3 +309,8 @@ def analyze_document_relationships(doc_id: str) -> Dict[str, Any]:
         "ai_entities": entities_raw,
         "ai_relations": relations_raw,
     }
+
+    if focus_embedding is not None:
+        relation_cache.put(focus_embedding, candidate_scores, result)
+
+    return result
@@ -1,12 +1,6 @@
 """Delete Service
 Handles deletion of documents from both ChromaDB and the graph database.
 """
-import sys
-import os
-
-# Ensure project root is on sys.path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from typing import Dict, Any
 
 from backend.db.chroma_db import get_chroma_db
@@ -31,9 +25,9 @@ def delete_document(doc_id: str) -> Dict[str, Any]:
         # Delete from graph (including related edges and orphan entities)
         if graph_db.node_exists(doc_id):
             graph_deleted = graph_db.delete_document_node(doc_id)
-            # Persist graph after structural changes
+            # Persist graph after structural changes (coalesced)
             if graph_deleted:
-                graph_db.save_graph()
+                graph_db.schedule_save()
         else:
             # Nothing to delete from graph, but that's fine
             graph_deleted = True
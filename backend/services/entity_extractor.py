@@ -7,29 +7,62 @@ uses spaCy's noun_chunks to generate graph entities such as
 "artificial intelligence".
 """
 
+from __future__ import annotations
+
+import hashlib
+import os
 import re
-import string
+import threading
+from collections import OrderedDict
 from functools import lru_cache
-from typing import List, Optional, Set
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
 
-import spacy
-from spacy.language import Language
+if TYPE_CHECKING:  # spaCy itself is imported on first use
+    from spacy.language import Language
+    from spacy.tokens import Doc
 
 
 _MODEL_CANDIDATES = ("en_core_web_md", "en_core_web_sm")
+# Trimmed pipeline written by build_spacy_model.py; preferred when present
+_MIN_MODEL_PATH = os.getenv(
+    "SPACY_MIN_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models", "spacy_min"),
+)
+_UNUSED_PIPES = ["ner", "lemmatizer"]
+_PIPE_BATCH_SIZE = 64
+
+# Number of texts whose extracted entities are kept, keyed by a digest of the
+# text so the cache does not hold document bodies
+_ENTITY_CACHE_SIZE = 4096
+_entity_cache: "OrderedDict[bytes, Tuple[str, ...]]" = OrderedDict()
+_entity_cache_lock = threading.Lock()
+
+
+def _text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
 
 
 @lru_cache(maxsize=1)
 def _load_spacy_model() -> Language:
     """Load a spaCy English model, preferring the medium model if available.
 
-    Tries ``en_core_web_md`` first, then falls back to ``en_core_web_sm``.
+    Uses the trimmed pipeline at ``_MIN_MODEL_PATH`` if it has been built,
+    otherwise tries ``en_core_web_md`` and then ``en_core_web_sm``.
     Raises a clear error if no model can be loaded.
+
+    Only ``noun_chunks`` is used, which needs the parser plus the tagger and
+    attribute_ruler (for POS tags); NER and the lemmatizer are not loaded.
     """
+    import spacy
+
+    candidates = list(_MODEL_CANDIDATES)
+    if os.path.isdir(_MIN_MODEL_PATH):
+        candidates.insert(0, _MIN_MODEL_PATH)
+
     last_error: Optional[Exception] = None
-    for model_name in _MODEL_CANDIDATES:
+    for model_name in candidates:
         try:
-            return spacy.load(model_name)
+            return spacy.load(model_name, exclude=_UNUSED_PIPES)
         except Exception as exc:  # pragma: no cover - environment dependent
             last_error = exc
     raise RuntimeError(
@@ -39,11 +72,23 @@ def _load_spacy_model() -> Language:
     ) from last_error
 
 
-# Load the model once at import time for efficiency
-_nlp = _load_spacy_model()
+_nlp_lock = threading.Lock()
+
+
+def _get_nlp() -> Language:
+    """Return the shared spaCy pipeline, loading it on first use.
+
+    Processes that never extract entities (and plain imports of this module)
+    don't pay for spaCy or the model.
+    """
+    # The lock stops concurrent first requests from each loading a copy
+    with _nlp_lock:
+        return _load_spacy_model()
 
 
 _ALPHA_RE = re.compile(r"[a-zA-Z]")
+# Leading/trailing whitespace, punctuation and underscores
+_EDGE_STRIP_RE = re.compile(r"^[\W_]+|[\W_]+$")
 
 
 def _normalize_phrase(text: str) -> str:
@@ -55,40 +100,15 @@ def _normalize_phrase(text: str) -> str:
     - stripping leading/trailing punctuation
     - keep only phrases that contain at least one alphabetic character
     """
-    phrase = text.lower().strip()
-    phrase = phrase.strip(string.punctuation)
+    phrase = _EDGE_STRIP_RE.sub("", text.lower())
 
-    if not phrase:
-        return ""
-    if not _ALPHA_RE.search(phrase):
+    if not phrase or not _ALPHA_RE.search(phrase):
         return ""
     return phrase
 
 
-def extract_entities_spacy(text: str) -> List[str]:
-    """Extract high‑quality noun‑phrase entities from text using spaCy.
-
-    Extraction logic:
-    - Use ``doc.noun_chunks`` from spaCy
-    - Remove chunks that are only stopwords or punctuation
-    - Only keep chunks that contain alphabetic characters
-    - Normalize by:
-      * lowercasing
-      * trimming whitespace
-      * removing leading/trailing punctuation
-    - Deduplicate final list while preserving order
-
-    Args:
-        text: Input document text.
-
-    Returns:
-        List of normalized noun‑phrase entities.
-    """
-    if not text:
-        return []
-
-    doc = _nlp(text)
-
+def _entities_from_doc(doc: Doc) -> List[str]:
+    """Turn a parsed spaCy ``Doc`` into normalized, deduplicated entities."""
     seen: Set[str] = set()
     entities: List[str] = []
 
@@ -115,3 +135,76 @@ def extract_entities_spacy(text: str) -> List[str]:
             entities.append(normalized)
 
     return entities
+
+
+def extract_entities_spacy(text: str) -> List[str]:
+    """Extract high‑quality noun‑phrase entities from text using spaCy.
+
+    Extraction logic:
+    - Use ``doc.noun_chunks`` from spaCy
+    - Remove chunks that are only stopwords or punctuation
+    - Only keep chunks that contain alphabetic characters
+    - Normalize by:
+      * lowercasing
+      * trimming whitespace
+      * removing leading/trailing punctuation
+    - Deduplicate final list while preserving order
+
+    Args:
+        text: Input document text.
+
+    Returns:
+        List of normalized noun‑phrase entities.
+    """
+    return extract_entities_spacy_batch([text])[0]
+
+
+def extract_entities_spacy_batch(texts: List[str]) -> List[List[str]]:
+    """Extract noun‑phrase entities from several texts in one spaCy pass.
+
+    Uses ``nlp.pipe`` so the tagger and parser run over batches of
+    documents instead of one document at a time. Each result follows the
+    same rules as :func:`extract_entities_spacy`. Results are cached by
+    text digest, so duplicate texts are only parsed once.
+
+    Args:
+        texts: Input document texts.
+
+    Returns:
+        One list of normalized entities per input text, in input order.
+    """
+    results: List[List[str]] = [[] for _ in texts]
+
+    # Group positions by text digest: repeated texts (re-uploads, duplicates
+    # within the batch) are parsed at most once, and not at all if cached
+    pending: Dict[bytes, List[int]] = {}
+    with _entity_cache_lock:
+        for i, text in enumerate(texts):
+            if not text:
+                continue
+            key = _text_key(text)
+            cached = _entity_cache.get(key)
+            if cached is not None:
+                _entity_cache.move_to_end(key)
+                results[i] = list(cached)
+            else:
+                pending.setdefault(key, []).append(i)
+
+    if not pending:
+        return results
+
+    docs = _get_nlp().pipe((texts[ids[0]] for ids in pending.values()), batch_size=_PIPE_BATCH_SIZE)
+    parsed = [(key, tuple(_entities_from_doc(doc))) for key, doc in zip(pending, docs)]
+
+    with _entity_cache_lock:
+        for key, entities in parsed:
+            _entity_cache[key] = entities
+            _entity_cache.move_to_end(key)
+        while len(_entity_cache) > _ENTITY_CACHE_SIZE:
+            _entity_cache.popitem(last=False)
+
+    for key, entities in parsed:
+        for i in pending[key]:
+            results[i] = list(entities)
+
+    return results
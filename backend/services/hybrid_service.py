@@ -2,32 +2,35 @@
 Hybrid Search Service
 Combines semantic vector search with graph-based relationship reasoning
 """
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 from typing import Dict, List, Any, Set
+
+import numpy as np
+
 from backend.services.search_service import semantic_search
 from backend.db.graph_db import get_graph_db
 from backend.db.chroma_db import get_chroma_db
 from backend.services.ai_relation_service import analyze_document_relationships
 from models.llm_client import is_llm_configured
 
+# Minimum number of graph entities before the LLM relationship path is tried
+_MIN_ENTITIES_FOR_LLM = 2
+
 def _normalize_scores(raw_scores: Dict[str, float]) -> Dict[str, float]:
     """Min-max normalise a mapping of id -> score into [0, 1]."""
     if not raw_scores:
         return {}
 
-    values = list(raw_scores.values())
-    max_v = max(values)
-    min_v = min(values)
+    keys = list(raw_scores)
+    values = np.fromiter(raw_scores.values(), dtype=np.float64, count=len(keys))
+    min_v = values.min()
+    span = values.max() - min_v
 
-    if max_v == min_v:
+    if span == 0:
         # All equal; if non-zero, treat them all as 1.0, else 0.0
-        return {k: (1.0 if max_v > 0 else 0.0) for k in raw_scores}
+        fill = 1.0 if min_v > 0 else 0.0
+        return dict.fromkeys(keys, fill)
 
-    span = max_v - min_v
-    return {k: (v - min_v) / span for k, v in raw_scores.items()}
+    return dict(zip(keys, ((values - min_v) / span).tolist()))
 
 def hybrid_search(query: str, top_k: int = 5, graph_depth: int = 2) -> Dict[str, Any]:
     """Perform true hybrid search combining vector similarity + graph expansion.
@@ -97,12 +100,18 @@ def hybrid_search(query: str, top_k: int = 5, graph_depth: int = 2) -> Dict[str,
         entity_to_docs: Dict[str, Set[str]] = {}
 
         if graph_depth >= 2:
+            # Vector hits often share entities; look each one up only once.
+            entity_docs_cache: Dict[str, List[str]] = {}
+
             for doc_id in vector_hits.keys():
                 # Get entities attached to this document.
                 entities = graph_db.get_document_entities(doc_id)
 
                 for entity in entities:
-                    related_docs = graph_db.get_related_documents(entity)
+                    related_docs = entity_docs_cache.get(entity)
+                    if related_docs is None:
+                        related_docs = graph_db.get_related_documents(entity)
+                        entity_docs_cache[entity] = related_docs
                     # Filter out the source document itself.
                     related_docs = [d for d in related_docs if d != doc_id]
                     if not related_docs:
@@ -133,9 +142,14 @@ def hybrid_search(query: str, top_k: int = 5, graph_depth: int = 2) -> Dict[str,
         graph_expansion_results: List[Dict[str, Any]] = []
         graph_docs_payload: Dict[str, Dict[str, Any]] = {}
 
+        # Vector hits already carry their text and metadata; fetch only the
+        # remaining expanded documents from Chroma, in one call.
+        graph_docs = chroma_db.get_documents_bulk(
+            [d for d in graph_scores_raw if d not in vector_hits]
+        )
+
         for doc_id, g_score in graph_scores_raw.items():
-            # Fetch document content from Chroma.
-            doc_data = chroma_db.get_document(doc_id)
+            doc_data = vector_hits.get(doc_id) or graph_docs.get(doc_id)
             if not doc_data:
                 continue
 
@@ -159,22 +173,26 @@ def hybrid_search(query: str, top_k: int = 5, graph_depth: int = 2) -> Dict[str,
         vector_scores_norm = _normalize_scores(vector_scores_raw)
         graph_scores_norm = _normalize_scores(graph_scores_raw)
 
-        hybrid_results: List[Dict[str, Any]] = []
-        all_doc_ids = set(vector_hits.keys()) | set(graph_docs_payload.keys())
+        # Vector hits first, then graph-only docs, so ties keep a stable order.
+        doc_list = list(vector_hits) + [d for d in graph_docs_payload if d not in vector_hits]
+        v_raw = np.array([vector_scores_raw.get(d, 0.0) for d in doc_list], dtype=np.float64)
+        v_norm = np.array([vector_scores_norm.get(d, 0.0) for d in doc_list], dtype=np.float64)
+        g_raw = np.array([graph_scores_raw.get(d, 0.0) for d in doc_list], dtype=np.float64)
+        g_norm = np.array([graph_scores_norm.get(d, 0.0) for d in doc_list], dtype=np.float64)
 
-        for doc_id in all_doc_ids:
-            v_raw = vector_scores_raw.get(doc_id, 0.0)
-            v_norm = vector_scores_norm.get(doc_id, 0.0)
-            g_raw = graph_scores_raw.get(doc_id, 0.0)
-            g_norm = graph_scores_norm.get(doc_id, 0.0)
+        # Weighted combination; weights can be tuned.
+        final = 0.7 * v_norm + 0.3 * g_norm
+        # Sort by final hybrid score (descending)
+        order = np.argsort(-final, kind="stable")
 
-            # Weighted combination; weights can be tuned.
-            final_score = 0.7 * v_norm + 0.3 * g_norm
+        final_l, v_raw_l, v_norm_l = final.tolist(), v_raw.tolist(), v_norm.tolist()
+        g_raw_l, g_norm_l = g_raw.tolist(), g_norm.tolist()
 
-            if doc_id in vector_hits:
-                base = vector_hits[doc_id].copy()
-            else:
-                base = graph_docs_payload[doc_id].copy()
+        hybrid_results: List[Dict[str, Any]] = []
+        for idx in order.tolist():
+            doc_id = doc_list[idx]
+
+            src = vector_hits.get(doc_id) or graph_docs_payload[doc_id]
 
             # Explanation/source label.
             if doc_id in vector_hits and doc_id in graph_docs_payload:
@@ -184,23 +202,25 @@ def hybrid_search(query: str, top_k: int = 5, graph_depth: int = 2) -> Dict[str,
             else:
                 source = "graph_expansion"
 
-            base.update(
-                {
-                    "source": source,
-                    # Final hybrid score is exposed as relevance_score so the
-                    # frontend can display it consistently.
-                    "relevance_score": final_score,
-                    "vector_score": v_raw,
-                    "vector_score_normalized": v_norm,
-                    "graph_score": g_raw,
-                    "graph_score_normalized": g_norm,
-                }
-            )
-
-            hybrid_results.append(base)
+            # Build the output directly rather than copying and updating the
+            # source payload.
+            out = {
+                "doc_id": doc_id,
+                "document": src.get("document"),
+                "metadata": src.get("metadata"),
+                "source": source,
+                # Final hybrid score is exposed as relevance_score so the
+                # frontend can display it consistently.
+                "relevance_score": final_l[idx],
+                "vector_score": v_raw_l[idx],
+                "vector_score_normalized": v_norm_l[idx],
+                "graph_score": g_raw_l[idx],
+                "graph_score_normalized": g_norm_l[idx],
+            }
+            if "distance" in src:
+                out["distance"] = src["distance"]
 
-        # Sort by final hybrid score (descending)
-        hybrid_results.sort(key=lambda x: x.get("relevance_score", 0.0), reverse=True)
+            hybrid_results.append(out)
 
         # Vector hits list for the response (keep original order, but annotate
         # with source + scores for transparency).
@@ -318,11 +338,15 @@ def get_document_relationships(doc_id: str) -> Dict[str, Any]:
         frontend contract.
     """
     # First, try the AI-powered implementation if the LLM is configured.
+    # Documents with fewer than two entities give the LLM almost nothing to
+    # link, so the graph answer below is used for them directly.
     if is_llm_configured():
         try:
-            ai_result = analyze_document_relationships(doc_id)
-            if ai_result.get("success"):
-                return ai_result
+            entities_count = len(get_graph_db().get_document_entities(doc_id))
+            if entities_count >= _MIN_ENTITIES_FOR_LLM:
+                ai_result = analyze_document_relationships(doc_id)
+                if ai_result.get("success"):
+                    return ai_result
         except Exception:
             # If anything goes wrong with the AI layer, fall back silently to
             # the graph-based implementation below.
@@ -3,16 +3,74 @@ Document Ingestion Service
 Handles document ingestion pipeline including embedding generation,
 storage in ChromaDB, entity extraction, and graph building
 """
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple
 
-from typing import Dict, List, Optional, Any
+import numpy as np
 
-from models.embedding_model import generate_embedding
+from models.embedding_model import generate_embedding, generate_embeddings_batch
 from backend.db.chroma_db import get_chroma_db
 from backend.db.graph_db import get_graph_db
-from backend.services.entity_extractor import extract_entities_spacy
+from backend.services.entity_extractor import extract_entities_spacy, extract_entities_spacy_batch
+
+# Runs entity extraction alongside embedding + ChromaDB writes in ingest_document.
+# Sized like FastAPI's request threadpool (_THREADPOOL_SIZE in backend/main.py)
+# so concurrent requests never queue behind each other's extraction.
+_INGEST_WORKERS = 64
+_INGEST_EXECUTOR = ThreadPoolExecutor(max_workers=_INGEST_WORKERS, thread_name_prefix="ingest")
+
+
+def _build_document_graph(
+    doc_id: str,
+    text: str,
+    embedding: np.ndarray,
+    metadata: Optional[Dict[str, Any]] = None,
+    entities: Optional[List[str]] = None,
+    persist: bool = True
+) -> Dict[str, Any]:
+    """
+    Run the graph half of the pipeline for a document already in ChromaDB
+    
+    Pipeline:
+    1. Extract entities
+    2. Build graph relationships
+    3. Persist graph
+    
+    Args:
+        doc_id: Unique document identifier
+        text: Document text content
+        embedding: Embedding vector stored for the document
+        metadata: Optional metadata dictionary
+        entities: Entities already extracted for this text, if any
+        persist: Schedule a graph save; batch callers pass False and
+            schedule one save for the whole batch
+        
+    Returns:
+        Dictionary with ingestion results
+    """
+    # Step 1: Extract entities using spaCy noun-phrase extractor
+    if entities is None:
+        entities = extract_entities_spacy(text)
+    
+    # Step 2: Build graph
+    graph_db = get_graph_db()
+    
+    # Add document node, entity nodes and edges in bulk
+    graph_db.add_document_subgraph(doc_id, entities)
+    
+    # Step 3: Persist graph (coalesced with other pending writes)
+    if persist:
+        graph_db.schedule_save()
+    
+    # Return success
+    return {
+        "success": True,
+        "doc_id": doc_id,
+        "entities_extracted": len(entities),
+        "entities": entities,
+        "metadata": metadata or {},
+        "embedding_dim": len(embedding)
+    }
 
 
 def ingest_document(
@@ -38,7 +96,16 @@ def ingest_document(
     Returns:
         Dictionary with ingestion results
     """
+    entities_future = None
     try:
+        # Validate before starting any background work
+        if not text or not text.strip():
+            raise ValueError("Text cannot be empty")
+        
+        # Step 3 does not depend on the embedding, so run entity extraction
+        # in the background while this thread embeds and writes to ChromaDB
+        entities_future = _INGEST_EXECUTOR.submit(extract_entities_spacy, text)
+        
         # Step 1: Generate embedding
         embedding = generate_embedding(text)
         
@@ -52,42 +119,20 @@ def ingest_document(
         )
         
         if not chroma_success:
+            entities_future.cancel()
             return {
                 "success": False,
                 "error": "Failed to store document in ChromaDB"
             }
         
-        # Step 3: Extract entities using spaCy noun-phrase extractor
-        entities = extract_entities_spacy(text)
-        
-        # Step 4: Build graph
-        graph_db = get_graph_db()
-        
-        # Add document node
-        graph_db.add_document_node(doc_id)
-        
-        # Add entity nodes and edges
-        for entity in entities:
-            graph_db.add_entity_node(entity)
-            graph_db.add_edge_between(doc_id, entity)
-        
-        # Step 5: Persist graph
-        graph_success = graph_db.save_graph()
-        
-        if not graph_success:
-            print("Warning: Failed to persist graph to disk")
-        
-        # Return success
-        return {
-            "success": True,
-            "doc_id": doc_id,
-            "entities_extracted": len(entities),
-            "entities": entities,
-            "metadata": metadata or {},
-            "embedding_dim": len(embedding)
-        }
+        # Steps 3-5: Entities, graph and persistence
+        entities = entities_future.result()
+        return _build_document_graph(doc_id, text, embedding, metadata, entities)
         
     except Exception as e:
+        # Drop the extraction if it hasn't started; the document failed anyway
+        if entities_future is not None:
+            entities_future.cancel()
         return {
             "success": False,
             "error": str(e)
@@ -100,6 +145,11 @@ def batch_ingest_documents(
     """
     Ingest multiple documents at once
     
+    Embeddings are generated with one batched model call, and all
+    documents are written to ChromaDB with batched ``add`` calls before
+    the graph is built.
+    Entities for all stored documents are extracted in one spaCy pass.
+    
     Args:
         documents: List of documents, each with doc_id, text, and optional metadata
         
@@ -113,22 +163,103 @@ def batch_ingest_documents(
         "details": []
     }
     
-    for doc in documents:
+    # Keep per-document details in input order
+    details: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+    
+    # (position, doc_id, text, metadata) for documents that passed validation
+    valid: List[Tuple[int, str, str, Optional[Dict[str, Any]]]] = []
+    
+    for i, doc in enumerate(documents):
         doc_id = doc.get("doc_id")
         text = doc.get("text")
         metadata = doc.get("metadata")
         
         if not doc_id or not text:
-            results["failed"] += 1
-            results["details"].append({
+            details[i] = {
                 "doc_id": doc_id,
                 "success": False,
                 "error": "Missing doc_id or text"
-            })
+            }
+            continue
+        
+        if not text.strip():
+            details[i] = {
+                "doc_id": doc_id,
+                "success": False,
+                "error": "Text cannot be empty"
+            }
             continue
         
-        result = ingest_document(doc_id, text, metadata)
+        valid.append((i, doc_id, text, metadata))
+    
+    # Embed all valid texts together; if the batch fails, embed one by one
+    # so only the offending documents are reported as failed
+    try:
+        embeddings: List[Optional[np.ndarray]] = list(
+            generate_embeddings_batch([text for _, _, text, _ in valid])
+        )
+    except Exception:
+        embeddings = [None] * len(valid)
+    
+    # (position, doc_id, text, embedding, metadata) for documents to store
+    pending: List[Tuple[int, str, str, np.ndarray, Optional[Dict[str, Any]]]] = []
+    
+    for (i, doc_id, text, metadata), embedding in zip(valid, embeddings):
+        if embedding is None:
+            try:
+                embedding = generate_embedding(text)
+            except Exception as e:
+                details[i] = {
+                    "doc_id": doc_id,
+                    "success": False,
+                    "error": str(e)
+                }
+                continue
+        
+        pending.append((i, doc_id, text, embedding, metadata))
+    
+    if pending:
+        chroma_db = get_chroma_db()
+        stored = chroma_db.add_documents_to_chroma(
+            [(doc_id, text, embedding, metadata) for _, doc_id, text, embedding, metadata in pending]
+        )
         
+        stored_docs = []
+        for (i, doc_id, text, embedding, metadata), chroma_success in zip(pending, stored):
+            if not chroma_success:
+                details[i] = {
+                    "doc_id": doc_id,
+                    "success": False,
+                    "error": "Failed to store document in ChromaDB"
+                }
+                continue
+            stored_docs.append((i, doc_id, text, embedding, metadata))
+        
+        try:
+            entity_lists = extract_entities_spacy_batch([text for _, _, text, _, _ in stored_docs])
+        except Exception:
+            # Fall back to per-document extraction so one bad text only
+            # fails its own document
+            entity_lists = [None] * len(stored_docs)
+        
+        try:
+            for (i, doc_id, text, embedding, metadata), entities in zip(stored_docs, entity_lists):
+                try:
+                    details[i] = _build_document_graph(
+                        doc_id, text, embedding, metadata, entities, persist=False
+                    )
+                except Exception as e:
+                    details[i] = {
+                        "doc_id": doc_id,
+                        "success": False,
+                        "error": str(e)
+                    }
+        finally:
+            # One save for the whole batch
+            if stored_docs:
+                get_graph_db().schedule_save()
+    
+    for result in details:
         if result["success"]:
             results["successful"] += 1
         else:
@@ -2,15 +2,30 @@
 Search Service
 Handles semantic search operations using vector embeddings
 """
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from typing import Dict, List, Any, Optional
 
-from typing import Dict, List, Any
-from models.embedding_model import generate_embedding
+import numpy as np
+
+from models.embedding_model import generate_embedding, generate_embeddings_batch
 from backend.db.chroma_db import get_chroma_db
 
 
+def _format_results(results: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Turn ChromaDB's parallel result lists into one dict per hit"""
+    return [
+        {
+            "doc_id": doc_id,
+            "document": document,
+            "metadata": metadata,
+            "distance": distance,
+            "relevance_score": 1 - distance  # Convert distance to similarity
+        }
+        for doc_id, document, metadata, distance in zip(
+            results["doc_ids"], results["documents"], results["metadatas"], results["distances"]
+        )
+    ]
+
+
 def semantic_search(query: str, top_k: int = 5) -> Dict[str, Any]:
     """
     Perform semantic search using query embedding
@@ -34,15 +49,7 @@ def semantic_search(query: str, top_k: int = 5) -> Dict[str, Any]:
         )
         
         # Format results for better readability
-        formatted_results = []
-        for i in range(len(results["doc_ids"])):
-            formatted_results.append({
-                "doc_id": results["doc_ids"][i],
-                "document": results["documents"][i],
-                "metadata": results["metadatas"][i],
-                "distance": results["distances"][i],
-                "relevance_score": 1 - results["distances"][i]  # Convert distance to similarity
-            })
+        formatted_results = _format_results(results)
         
         return {
             "success": True,
@@ -61,28 +68,80 @@ def semantic_search(query: str, top_k: int = 5) -> Dict[str, Any]:
         }
 
 
-def search_by_document_id(doc_id: str) -> Dict[str, Any]:
+def semantic_search_batch(queries: List[str], top_k: int = 5) -> Dict[str, Any]:
+    """
+    Perform semantic search for several queries with a single ChromaDB call
+    
+    Args:
+        queries: List of search query texts
+        top_k: Number of results to return per query
+        
+    Returns:
+        Dictionary containing one semantic_search-style result per query
+    """
+    try:
+        # Generate query embeddings as one (B, D) block in a single model call
+        query_embeddings = generate_embeddings_batch(queries)
+        
+        # Perform all searches in ChromaDB at once
+        chroma_db = get_chroma_db()
+        batch_results = chroma_db.semantic_search_batch(
+            query_embeddings=query_embeddings,
+            top_k=top_k
+        )
+        
+        searches = []
+        for query, results in zip(queries, batch_results):
+            formatted_results = _format_results(results)
+            
+            searches.append({
+                "success": True,
+                "query": query,
+                "results_count": len(formatted_results),
+                "results": formatted_results
+            })
+        
+        return {
+            "success": True,
+            "queries_count": len(searches),
+            "searches": searches
+        }
+        
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "queries_count": 0,
+            "searches": []
+        }
+
+
+def search_by_document_id(doc_id: str, include_embedding: bool = False) -> Dict[str, Any]:
     """
     Retrieve a specific document by its ID
     
     Args:
         doc_id: Document identifier
+        include_embedding: Also return the stored embedding vector
         
     Returns:
         Dictionary containing document data
     """
     try:
         chroma_db = get_chroma_db()
-        document = chroma_db.get_document(doc_id)
+        document = chroma_db.get_document(doc_id, include_embedding=include_embedding)
         
         if document:
-            return {
+            result = {
                 "success": True,
                 "found": True,
                 "doc_id": doc_id,
                 "document": document["document"],
                 "metadata": document["metadata"]
             }
+            if include_embedding and document["embedding"] is not None:
+                result["embedding"] = np.asarray(document["embedding"]).tolist()
+            return result
         else:
             return {
                 "success": True,
@@ -100,50 +159,51 @@ def search_by_document_id(doc_id: str) -> Dict[str, Any]:
         }
 
 
-def get_similar_documents(doc_id: str, top_k: int = 5) -> Dict[str, Any]:
+def get_similar_documents(
+    doc_id: str,
+    top_k: int = 5,
+    embedding: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
     """
     Find documents similar to a given document
     
     Args:
         doc_id: Document identifier
         top_k: Number of similar documents to return
+        embedding: The document's stored embedding, if the caller already
+            has it; otherwise it is fetched from ChromaDB
         
     Returns:
         Dictionary containing similar documents
     """
     try:
-        # Get the source document
         chroma_db = get_chroma_db()
-        source_doc = chroma_db.get_document(doc_id)
         
-        if not source_doc or not source_doc.get("embedding"):
-            return {
-                "success": False,
-                "error": "Document not found or has no embedding",
-                "results_count": 0,
-                "results": []
-            }
+        if embedding is None:
+            # Get the source document
+            source_doc = chroma_db.get_document(doc_id, include_embedding=True)
+            
+            # The embedding is a numpy array, so test for None explicitly
+            # rather than relying on its (ambiguous) truth value.
+            if not source_doc or source_doc.get("embedding") is None:
+                return {
+                    "success": False,
+                    "error": "Document not found or has no embedding",
+                    "results_count": 0,
+                    "results": []
+                }
+            embedding = source_doc["embedding"]
         
         # Use the document's embedding to find similar documents
         results = chroma_db.semantic_search(
-            query_embedding=source_doc["embedding"],
+            query_embedding=embedding,
             top_k=top_k + 1  # +1 because the source document will be in results
         )
         
-        # Filter out the source document itself
-        formatted_results = []
-        for i in range(len(results["doc_ids"])):
-            if results["doc_ids"][i] != doc_id:
-                formatted_results.append({
-                    "doc_id": results["doc_ids"][i],
-                    "document": results["documents"][i],
-                    "metadata": results["metadatas"][i],
-                    "distance": results["distances"][i],
-                    "relevance_score": 1 - results["distances"][i]
-                })
-        
-        # Limit to top_k results
-        formatted_results = formatted_results[:top_k]
+        # Filter out the source document itself and limit to top_k results
+        formatted_results = [
+            res for res in _format_results(results) if res["doc_id"] != doc_id
+        ][:top_k]
         
         return {
             "success": True,
@@ -0,0 +1,49 @@
+"""
+Build a trimmed spaCy pipeline for entity extraction
+
+Entity extraction only uses ``noun_chunks`` (tagger, attribute_ruler and
+parser), so this saves a copy of the installed English model without NER
+and the lemmatizer to ``models/spacy_min``. Static word vectors are dropped
+as well when the pipeline's tok2vec does not use them (e.g. en_core_web_sm);
+en_core_web_md feeds them into tok2vec, so they are kept there.
+
+backend/services/entity_extractor.py loads this directory when it exists
+(override the location with SPACY_MIN_MODEL_PATH).
+
+Usage:
+    python build_spacy_model.py [model_name]
+"""
+import os
+import sys
+
+import spacy
+
+MODEL_CANDIDATES = ("en_core_web_md", "en_core_web_sm")
+UNUSED_PIPES = ["ner", "lemmatizer"]
+OUTPUT_PATH = os.getenv(
+    "SPACY_MIN_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "spacy_min"),
+)
+
+
+def load_source_model(names):
+    last_error = None
+    for name in names:
+        try:
+            return name, spacy.load(name, exclude=UNUSED_PIPES)
+        except Exception as exc:
+            last_error = exc
+    raise SystemExit(f"Could not load any of {', '.join(names)}: {last_error}")
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:2] or list(MODEL_CANDIDATES)
+    name, nlp = load_source_model(names)
+
+    uses_vectors = "include_static_vectors = true" in nlp.config.to_str()
+    exclude = [] if uses_vectors else ["vectors"]
+
+    nlp.to_disk(OUTPUT_PATH, exclude=exclude)
+    print(f"Saved {name} ({', '.join(nlp.pipe_names)}) to {OUTPUT_PATH}")
+    if uses_vectors:
+        print("Kept static vectors: this pipeline's tok2vec uses them")
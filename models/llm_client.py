@@ -13,31 +13,33 @@ client details. It is intentionally minimal:
 
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 try:  # The groq package may not be installed in all environments yet.
-    from groq import Groq  # type: ignore
+    from groq import AsyncGroq, Groq  # type: ignore
 except Exception:  # pragma: no cover - import error handled at runtime
+    AsyncGroq = None  # type: ignore
     Groq = None  # type: ignore
 
 
-_CLIENT: Optional["Groq"] = None
-
-
+@lru_cache(maxsize=1)
 def _get_client() -> Optional["Groq"]:
     """Return a singleton Groq client instance, or None if unavailable.
 
     We treat the client as unavailable if:
     - The groq package is not installed, or
     - The GROQ_API_KEY environment variable is not set.
-    """
 
-    global _CLIENT
-
-    if _CLIENT is not None:
-        return _CLIENT
+    The result (including "unavailable") is cached for the life of the
+    process, so GROQ_API_KEY must be set before the first LLM call, e.g.
+    via the .env file loaded by run_dev.py.
+    """
 
     if Groq is None:
         return None
@@ -48,11 +50,25 @@ def _get_client() -> Optional["Groq"]:
         return None
 
     try:
-        _CLIENT = Groq(api_key=api_key)
-        return _CLIENT
+        return Groq(api_key=api_key)
     except Exception:
         # If client construction fails, treat as unavailable.
-        _CLIENT = None
+        return None
+
+
+def _new_async_client() -> Optional["AsyncGroq"]:
+    """Create an `AsyncGroq` client, or None if unavailable.
+
+    Not cached like `_get_client`: an async client's connection pool is tied
+    to the event loop it was first used on, so each loop needs its own.
+    """
+
+    if AsyncGroq is None or not os.getenv("GROQ_API_KEY"):
+        return None
+
+    try:
+        return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+    except Exception:
         return None
 
 
@@ -74,8 +90,8 @@ def _extract_json_from_text(text: str) -> Dict[str, Any]:
 
     # Fast path: direct JSON
     try:
-        return json.loads(text)
-    except Exception:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         pass
 
     # Try to locate a JSON object inside the text
@@ -85,7 +101,11 @@ def _extract_json_from_text(text: str) -> Dict[str, Any]:
         raise ValueError("LLM output did not contain a JSON object")
 
     candidate = text[start : end + 1]
-    return json.loads(candidate)
+    try:
+        return orjson.loads(candidate)
+    except orjson.JSONDecodeError:
+        # orjson is strict; the stdlib parser also accepts NaN/Infinity
+        return json.loads(candidate)
 
 
 def call_llm_for_json(
@@ -117,6 +137,103 @@ def call_llm_for_json(
     if client is None:
         raise RuntimeError("Groq LLM client is not configured (missing package or GROQ_API_KEY)")
 
+    completion = client.chat.completions.create(
+        **_completion_kwargs(model, system_prompt, user_content, temperature, max_output_tokens)
+    )
+    return _parse_completion(completion)
+
+
+async def acall_llm_for_json(
+    *,
+    model: str = "openai/gpt-oss-20b",
+    system_prompt: str,
+    user_content: str,
+    temperature: float = 0.2,
+    max_output_tokens: int = 2048,
+    client: Optional["AsyncGroq"] = None,
+) -> Dict[str, Any]:
+    """Async variant of `call_llm_for_json`, using the `AsyncGroq` client.
+
+    Takes the same arguments and returns / raises the same way. Pass
+    `client` to share one connection pool across concurrent calls; otherwise
+    a client is created for this call and closed afterwards.
+    """
+
+    if client is None:
+        owned_client = _new_async_client()
+        if owned_client is None:
+            raise RuntimeError("Groq LLM client is not configured (missing package or GROQ_API_KEY)")
+        async with owned_client:
+            return await acall_llm_for_json(
+                model=model,
+                system_prompt=system_prompt,
+                user_content=user_content,
+                temperature=temperature,
+                max_output_tokens=max_output_tokens,
+                client=owned_client,
+            )
+
+    completion = await client.chat.completions.create(
+        **_completion_kwargs(model, system_prompt, user_content, temperature, max_output_tokens)
+    )
+    return _parse_completion(completion)
+
+
+def call_llm_for_json_batch(
+    *,
+    system_prompt: str,
+    user_contents: List[str],
+    **kwargs: Any,
+) -> List[Any]:
+    """Run several `call_llm_for_json` prompts concurrently.
+
+    All requests are in flight at once, so the wall time is roughly that of
+    the slowest call rather than the sum. Must be called from synchronous
+    code (e.g. a sync endpoint on the threadpool), not from inside a running
+    event loop; async callers should gather `acall_llm_for_json` directly.
+
+    Args:
+        system_prompt: System message shared by every request.
+        user_contents: One user message per request.
+        **kwargs: Passed through to `acall_llm_for_json` (model, temperature...).
+
+    Returns:
+        One entry per prompt, in order: the parsed JSON dict, or the exception
+        raised for that prompt.
+
+    Raises:
+        RuntimeError: If the LLM client is not available.
+    """
+
+    client = _new_async_client()
+    if client is None:
+        raise RuntimeError("Groq LLM client is not configured (missing package or GROQ_API_KEY)")
+
+    async def _gather() -> List[Any]:
+        async with client:
+            return await asyncio.gather(
+                *(
+                    acall_llm_for_json(
+                        system_prompt=system_prompt,
+                        user_content=content,
+                        client=client,
+                        **kwargs,
+                    )
+                    for content in user_contents
+                ),
+                return_exceptions=True,
+            )
+
+    return asyncio.run(_gather())
+
+
+def _completion_kwargs(
+    model: str,
+    system_prompt: str,
+    user_content: str,
+    temperature: float,
+    max_output_tokens: int,
+) -> Dict[str, Any]:
     # Compose messages. We tell the model *explicitly* to respond with JSON.
     system_message = (
         system_prompt
@@ -124,7 +241,7 @@ def call_llm_for_json(
         "markdown, code fences, or explanatory text."
     )
 
-    completion = client.chat.completions.create(
+    return dict(
         model=model,
         temperature=temperature,
         max_completion_tokens=max_output_tokens,
@@ -138,6 +255,8 @@ def call_llm_for_json(
         ],
     )
 
+
+def _parse_completion(completion: Any) -> Dict[str, Any]:
     # Non-streaming: take the first choice's content.
     choice = completion.choices[0]
     text = choice.message.content or ""
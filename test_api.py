@@ -3,6 +3,7 @@ Test Script for Hybrid Vector + Graph AI Retrieval Engine
 Tests all endpoints and validates functionality
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 from typing import Dict, Any
@@ -10,6 +11,11 @@ from typing import Dict, Any
 
 BASE_URL = "http://localhost:8000"
 
+# Reuse one keep-alive connection across all tests
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10))
+
 
 def print_separator(title: str):
     """Print a visual separator"""
@@ -26,7 +32,7 @@ def print_result(result: Dict[str, Any]):
 def test_health_check():
     """Test health check endpoint"""
     print_separator("TEST 1: Health Check")
-    response = requests.get(f"{BASE_URL}/health")
+    response = SESSION.get(f"{BASE_URL}/health")
     print(f"Status Code: {response.status_code}")
     print_result(response.json())
     assert response.status_code == 200, "Health check failed"
@@ -36,7 +42,7 @@ def test_health_check():
 def test_root_endpoint():
     """Test root endpoint"""
     print_separator("TEST 2: Root Endpoint")
-    response = requests.get(f"{BASE_URL}/")
+    response = SESSION.get(f"{BASE_URL}/")
     print(f"Status Code: {response.status_code}")
     print_result(response.json())
     assert response.status_code == 200, "Root endpoint failed"
@@ -67,7 +73,7 @@ def test_add_documents():
     
     for doc in documents:
         print(f"\nAdding {doc['doc_id']}...")
-        response = requests.post(f"{BASE_URL}/add_document", json=doc)
+        response = SESSION.post(f"{BASE_URL}/add_document", json=doc)
         print(f"Status Code: {response.status_code}")
         result = response.json()
         print(f"  Entities extracted: {result.get('entities_extracted', 0)}")
@@ -81,7 +87,7 @@ def test_add_documents():
 def test_get_stats():
     """Test statistics endpoint"""
     print_separator("TEST 4: System Statistics")
-    response = requests.get(f"{BASE_URL}/stats")
+    response = SESSION.get(f"{BASE_URL}/stats")
     print(f"Status Code: {response.status_code}")
     print_result(response.json())
     assert response.status_code == 200, "Stats endpoint failed"
@@ -95,7 +101,7 @@ def test_semantic_search():
     query = "deep learning and neural networks"
     print(f"Query: '{query}'")
     
-    response = requests.get(f"{BASE_URL}/search", params={"q": query, "top_k": 3})
+    response = SESSION.get(f"{BASE_URL}/search", params={"q": query, "top_k": 3})
     print(f"\nStatus Code: {response.status_code}")
     result = response.json()
     
@@ -118,7 +124,7 @@ def test_get_document():
     doc_id = "doc1"
     print(f"Retrieving: {doc_id}")
     
-    response = requests.get(f"{BASE_URL}/document/{doc_id}")
+    response = SESSION.get(f"{BASE_URL}/document/{doc_id}")
     print(f"\nStatus Code: {response.status_code}")
     result = response.json()
     
@@ -139,7 +145,7 @@ def test_graph_neighbors():
     depth = 2
     print(f"Getting neighbors for: {doc_id} (depth={depth})")
     
-    response = requests.get(f"{BASE_URL}/graph_neighbors", params={"doc_id": doc_id, "depth": depth})
+    response = SESSION.get(f"{BASE_URL}/graph_neighbors", params={"doc_id": doc_id, "depth": depth})
     print(f"\nStatus Code: {response.status_code}")
     result = response.json()
     
@@ -164,7 +170,7 @@ def test_relationships():
     doc_id = "doc1"
     print(f"Getting relationships for: {doc_id}")
     
-    response = requests.get(f"{BASE_URL}/relationships/{doc_id}")
+    response = SESSION.get(f"{BASE_URL}/relationships/{doc_id}")
     print(f"\nStatus Code: {response.status_code}")
     result = response.json()
     
@@ -188,7 +194,7 @@ def test_hybrid_search():
     query = "artificial intelligence and machine learning"
     print(f"Query: '{query}'")
     
-    response = requests.get(f"{BASE_URL}/hybrid", params={"q": query, "top_k": 3, "depth": 2})
+    response = SESSION.get(f"{BASE_URL}/hybrid", params={"q": query, "top_k": 3, "depth": 2})
     print(f"\nStatus Code: {response.status_code}")
     result = response.json()
     